@@ -0,0 +1,57 @@
+// Follows the project change stream of the page being shown: every change,
+// or one project's on its detail page. Each change is handed to the
+// apply_project_change callback through the 'project-change' store.
+window.dash_clientside = window.dash_clientside || {};
+
+// Milliseconds between polls while the server refuses the stream (a 503
+// when all its streams are taken); the browser does not retry it by itself
+var PROJECT_EVENTS_POLL = 30000;
+
+function openProjectEvents(following) {
+    var source = new EventSource(following.url);
+    source.onmessage = function (event) {
+        window.dash_clientside.set_props('project-change', {data: JSON.parse(event.data)});
+    };
+    source.onerror = function () {
+        // A dropped stream reconnects on its own; a refused one is closed
+        if (source.readyState !== EventSource.CLOSED) {
+            return;
+        }
+        following.timer = setTimeout(function () {
+            if (window.projectEvents !== following) {
+                return;
+            }
+            // Reload whatever is shown, then try the stream again
+            window.dash_clientside.set_props('project-change',
+                {data: {id: Date.now(), project_id: null, action: 'reload'}});
+            openProjectEvents(following);
+        }, PROJECT_EVENTS_POLL);
+    };
+    following.source = source;
+}
+
+window.dash_clientside.project_events = {
+    follow: function (pathname) {
+        var url = null;
+        if (pathname === '/projects') {
+            url = '/events/projects';
+        } else if (/^\/project\/\d+$/.test(pathname || '')) {
+            url = '/events/projects?project=' + pathname.split('/').pop();
+        }
+
+        var current = window.projectEvents;
+        if (current && current.url === url) {
+            return window.dash_clientside.no_update;
+        }
+        if (current) {
+            clearTimeout(current.timer);
+            current.source.close();
+        }
+        window.projectEvents = null;
+        if (url) {
+            window.projectEvents = {url: url, source: null, timer: null};
+            openProjectEvents(window.projectEvents);
+        }
+        return url;
+    }
+};
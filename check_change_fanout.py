@@ -0,0 +1,133 @@
+# check_change_fanout.py
+"""Check the project change hub with thousands of subscribers
+
+Usage:
+    python check_change_fanout.py [--subscribers N] [--projects N] [--changes N]
+
+Subscribes N streams to a change hub, spread over some projects with
+every tenth one following all projects, the way open browser tabs would.
+Then it checks that:
+- each change reaches the subscribers of its project and those of every
+  project, and no one else;
+- buffers are bounded: publishing past CHANGE_BUFFER_SIZE does not take
+  more memory than a full buffer does;
+- a subscriber that fell behind gets a single reload up to the newest
+  change instead of the changes it missed.
+The changes are made up and handed to the hub directly, so the database
+is only read, never written. Time and traced memory are reported for
+each step; tracing memory slows Python down about threefold, so the
+times are an upper bound.
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+
+# Made-up changes get ids far above the audit log's, so real ones never collide
+ID_OFFSET = 10**12
+ACTION = 'check.fanout'
+
+def _made_up(changes):
+    """Keep the changes published by the check, dropping any real ones the hub read meanwhile"""
+    return [change for change in changes if change['action'] in (ACTION, 'reload')]
+
+def check_change_fanout(subscribers=5000, projects=100, changes=1000):
+    """Run the checks on a new hub and return a dict with the failures and measurements"""
+    from model.changes import CHANGE_BUFFER_SIZE, ChangeHub, latest_change_id
+
+    failures = []
+    report = {}
+    next_id = latest_change_id() + ID_OFFSET
+    def made_up_changes(project_ids):
+        nonlocal next_id
+        batch = []
+        for project_id in project_ids:
+            next_id += 1
+            batch.append({'id': next_id, 'project_id': project_id, 'action': ACTION})
+        return batch
+
+    hub = ChangeHub()
+    tracemalloc.start()
+    try:
+        # Subscribe
+        baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        subscriptions = [hub.subscribe(None if i % 10 == 0 else i % projects) for i in range(subscribers)]
+        report['subscribe'] = (time.perf_counter() - start, tracemalloc.get_traced_memory()[0] - baseline)
+        if hub.subscriber_count() != subscribers:
+            failures.append(f'{hub.subscriber_count()} subscribers counted instead of {subscribers}')
+
+        # Fan out: one change per project, round robin
+        published = made_up_changes(i % projects for i in range(changes))
+        start = time.perf_counter()
+        hub.publish(published)
+        report['publish'] = time.perf_counter() - start
+        wrong = 0
+        for subscription in subscriptions:
+            expected = [change for change in published if subscription.project_id in (None, change['project_id'])]
+            if len(expected) > CHANGE_BUFFER_SIZE:
+                # More than a buffer holds: a single reload up to the newest change
+                expected = [{'id': expected[-1]['id'], 'project_id': None, 'action': 'reload'}]
+            wrong += _made_up(subscription.wait(0)) != expected
+        if wrong:
+            failures.append(f'{wrong} subscribers did not receive exactly their changes')
+
+        # Bounded buffers: a full buffer, then as many changes again past it
+        full = made_up_changes([None] * CHANGE_BUFFER_SIZE)
+        before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        hub.publish(full)
+        report['fill'] = (time.perf_counter() - start, tracemalloc.get_traced_memory()[0] - before)
+        past = made_up_changes([None] * CHANGE_BUFFER_SIZE)
+        start = time.perf_counter()
+        hub.publish(past)
+        report['overflow'] = (time.perf_counter() - start, tracemalloc.get_traced_memory()[0] - before)
+        if report['overflow'][1] > report['fill'][1]:
+            failures.append('buffers kept growing past CHANGE_BUFFER_SIZE')
+
+        # Overflow: everyone fell behind, so everyone gets one reload
+        reload = [{'id': past[-1]['id'], 'project_id': None, 'action': 'reload'}]
+        behind = sum(_made_up(subscription.wait(0)) != reload for subscription in subscriptions)
+        if behind:
+            failures.append(f'{behind} subscribers did not get a single reload after overflowing')
+
+        for subscription in subscriptions:
+            hub.unsubscribe(subscription)
+        if hub.subscriber_count():
+            failures.append(f'{hub.subscriber_count()} subscribers left after unsubscribing')
+        report['peak_memory'] = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+    report['failures'] = failures
+    report['buffer_size'] = CHANGE_BUFFER_SIZE
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description='Check fan-out and bounded buffering of project changes')
+    parser.add_argument('--subscribers', type=int, default=5000, help='subscriptions to open (default: 5000)')
+    parser.add_argument('--projects', type=int, default=100, help='projects they follow (default: 100)')
+    parser.add_argument('--changes', type=int, default=1000,
+                        help='changes published for the fan-out check (default: 1000)')
+    args = parser.parse_args()
+
+    report = check_change_fanout(args.subscribers, args.projects, args.changes)
+    kib = 1024
+    subscribe_time, subscribe_memory = report['subscribe']
+    print(f"Subscribed {args.subscribers} in {subscribe_time * 1000:.1f} ms, "
+          f"{subscribe_memory / args.subscribers / kib:.2f} KiB each")
+    print(f"Published {args.changes} changes over {args.projects} projects in {report['publish'] * 1000:.1f} ms")
+    fill_time, fill_memory = report['fill']
+    overflow_time, overflow_memory = report['overflow']
+    print(f"Filled every buffer ({report['buffer_size']} changes) in {fill_time * 1000:.1f} ms, "
+          f"{fill_memory / args.subscribers / kib:.2f} KiB each")
+    print(f"Published {report['buffer_size']} more in {overflow_time * 1000:.1f} ms, "
+          f"{overflow_memory / args.subscribers / kib:.2f} KiB each after overflowing")
+    print(f"Peak traced memory {report['peak_memory'] / kib / kib:.1f} MiB")
+    for failure in report['failures']:
+        print(f'FAILED: {failure}')
+    if report['failures']:
+        sys.exit(1)
+    print('OK: changes fanned out, buffers bounded, overflow turned into a reload')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+# check_concurrent_writes.py
+"""Check that concurrent writers from several processes lose no writes
+
+Usage:
+    python check_concurrent_writes.py [--processes N] [--threads N] [--writes N]
+    SERIALIZE_WRITES=1 python check_concurrent_writes.py ...
+
+Each thread of each process creates projects, adds a member to each and
+edits its graph, all against the configured database, so the writes
+contend for SQLite's lock and go through the write path's retries. The
+rows are then counted straight from the database: every write that
+reported success must be there. The check runs as two throwaway users
+that are deleted with their projects at the end.
+"""
+import argparse
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+def run_writer(task):
+    """Run the writes of one process on several threads (runs in a worker process)
+
+    Returns the number of writes that reported success, the errors of the
+    others and the process's write path counters.
+    """
+    manager_id, member_id, prefix, threads, writes = task
+    from model import add_member_to_project, create_project, flush_audit_log, get_write_metrics, update_dot_graph
+
+    done = []
+    errors = []
+    def work(thread):
+        for i in range(writes):
+            try:
+                project_id = create_project(f'{prefix}-{thread}-{i}', date.today(), manager_id)
+                if not project_id:
+                    raise RuntimeError('project not created')
+                if not add_member_to_project(project_id, member_id):
+                    raise RuntimeError('member not added')
+                if not update_dot_graph(project_id, manager_id, f'digraph {{ t{thread} -> w{i} }}'):
+                    raise RuntimeError('graph not saved')
+                done.append(project_id)
+            except Exception as e:
+                errors.append(repr(e))
+
+    workers = [threading.Thread(target=work, args=(thread,)) for thread in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    flush_audit_log()
+    return len(done), errors, get_write_metrics()
+
+def count_rows(db_path, manager_id, member_id):
+    """Count the check's projects, memberships and graph edits in the database itself"""
+    conn = sqlite3.connect(db_path)
+    try:
+        projects = conn.execute('SELECT count(*) FROM "Project" WHERE "manager" = ?', (manager_id,)).fetchone()[0]
+        memberships = conn.execute('SELECT count(*) FROM "Project_User" WHERE "user" = ?', (member_id,)).fetchone()[0]
+        edits = conn.execute('''SELECT count(*) FROM "DotRevision" r JOIN "Project" p ON p."id" = r."project"
+            WHERE p."manager" = ? AND r."number" > 1''', (manager_id,)).fetchone()[0]
+        return {'projects': projects, 'memberships': memberships, 'edits': edits}
+    finally:
+        conn.close()
+
+def check_concurrent_writes(processes=4, threads=4, writes=25):
+    """Run the writers and compare what they reported with what the database holds
+
+    Returns a dict with the expected, reported and stored counts, the
+    errors, the summed write path counters and the elapsed time.
+    """
+    from model import add_user, delete_user, get_user_by_username
+    from model.database import DB_PATH
+    from model.write_path import SERIALIZE_WRITES
+
+    prefix = f'write-check-{uuid.uuid4().hex[:8]}'
+    for role in ('manager', 'member'):
+        if not add_user(f'{prefix}-{role}', uuid.uuid4().hex, email=''):
+            raise RuntimeError('Could not create the check users')
+    manager_id = get_user_by_username(f'{prefix}-manager').id
+    member_id = get_user_by_username(f'{prefix}-member').id
+    try:
+        start = time.perf_counter()
+        tasks = [(manager_id, member_id, f'{prefix}-p{process}', threads, writes) for process in range(processes)]
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = list(pool.map(run_writer, tasks))
+        elapsed = time.perf_counter() - start
+
+        metrics = {}
+        for _, _, process_metrics in results:
+            for key, value in process_metrics.items():
+                if key.startswith('max_'):
+                    metrics[key] = max(metrics.get(key, 0), value)
+                elif not key.startswith('avg_'):
+                    metrics[key] = metrics.get(key, 0) + value
+        return {
+            'serialized': SERIALIZE_WRITES,
+            'expected': processes * threads * writes,
+            'reported': sum(done for done, _, _ in results),
+            'stored': count_rows(DB_PATH, manager_id, member_id),
+            'errors': [error for _, errors, _ in results for error in errors],
+            'metrics': metrics,
+            'elapsed': elapsed
+        }
+    finally:
+        delete_user(manager_id, chunk_size=100)
+        delete_user(member_id)
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that concurrent writers lose no writes')
+    parser.add_argument('--processes', type=int, default=4, help='writer processes (default: 4)')
+    parser.add_argument('--threads', type=int, default=4, help='threads per process (default: 4)')
+    parser.add_argument('--writes', type=int, default=25,
+                        help='projects each thread creates, joins and edits (default: 25)')
+    args = parser.parse_args()
+
+    result = check_concurrent_writes(args.processes, args.threads, args.writes)
+    stored = result['stored']
+    metrics = result['metrics']
+    print(f"{args.processes} processes x {args.threads} threads, "
+          f"{'serialized' if result['serialized'] else 'concurrent'} writes per process")
+    print(f"Expected {result['expected']}, reported {result['reported']}; stored {stored['projects']} projects, "
+          f"{stored['memberships']} memberships, {stored['edits']} graph edits")
+    print(f"Took {result['elapsed']:.2f}s; {metrics.get('writes', 0)} writes, {metrics.get('retries', 0)} retries, "
+          f"{metrics.get('failures', 0)} failures, lock wait {metrics.get('lock_wait', 0.0):.3f}s "
+          f"(max {metrics.get('max_lock_wait', 0.0):.3f}s)")
+    for error in sorted(set(result['errors']))[:5]:
+        print(f'Error: {error}')
+
+    # Every write that reported success must be stored, and every write must succeed
+    if result['errors'] or any(count != result['reported'] for count in stored.values()) \
+            or result['reported'] != result['expected']:
+        print('FAILED: writes were lost or rejected')
+        sys.exit(1)
+    print('OK: no writes lost')
+
+if __name__ == '__main__':
+    main()
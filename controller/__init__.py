@@ -1,5 +1,8 @@
 # controller/__init__.py
 from .callbacks import register_callbacks
+from .export import register_export_routes
+from .events import register_event_routes
+from .compression import register_compression
 
 # Re-export the main functions to maintain compatibility
-__all__ = ['register_callbacks']
\ No newline at end of file
+__all__ = ['register_callbacks', 'register_export_routes', 'register_event_routes', 'register_compression']
\ No newline at end of file
@@ -1,56 +1,88 @@
 # controller/admin.py
 import dash
+from dash import html
 from dash.dependencies import Input, Output, State, ALL
 import dash_bootstrap_components as dbc
-from pony.orm import db_session
 import json
+import time
 from flask_login import current_user
 
-from model import list_all_users, promote_user_to_admin, delete_user
-from view import create_users_table
+from model import (
+    AUDIT_PAGE_SIZE, list_user_records, promote_users_to_admin, delete_users, list_audit_events,
+    get_users_version, read_session, write_session
+)
+from view import create_users_table, create_audit_table
+
+def render_users_table():
+    """Returns the users table of the admin panel"""
+    return create_users_table(list_user_records())
+
+def render_audit_page(trigger_id=None, bounds=None):
+    """Returns the audit table, page bounds and Newer/Older disabled flags for a paging action"""
+    bounds = bounds or {}
+    if trigger_id == 'audit-older-button' and bounds.get('oldest'):
+        events = list_audit_events(before_id=bounds['oldest'])
+    elif trigger_id == 'audit-newer-button' and bounds.get('newest'):
+        events = list_audit_events(after_id=bounds['newest'])
+        # Close to the top: show the latest full page instead of a short one
+        if len(events) < AUDIT_PAGE_SIZE:
+            events = list_audit_events()
+    else:
+        events = list_audit_events()
+    
+    if not events:
+        return html.P('No audit events recorded yet.'), None, True, True
+    
+    newest, oldest = events[0].id, events[-1].id
+    has_newer = bool(list_audit_events(after_id=newest, limit=1))
+    has_older = bool(list_audit_events(before_id=oldest, limit=1))
+    return (create_audit_table(events), {'newest': newest, 'oldest': oldest},
+            not has_newer, not has_older)
 
 def register_admin_callbacks(app):
     """Register admin panel related callbacks"""
     
-    # Callback to populate users table in admin panel
+    # Callback to refresh the users table (the page itself is rendered with it, see routing).
+    # The table is only rebuilt when the users changed since it was rendered
     @app.callback(
-        Output('users-table-container', 'children'),
-        [Input('url', 'pathname'),
-         Input('refresh-users-button', 'n_clicks')]
+        [Output('users-table-container', 'children'),
+         Output('users-table-version', 'data')],
+        [Input('refresh-users-button', 'n_clicks')],
+        [State('users-table-version', 'data')],
+        prevent_initial_call=True
     )
-    @db_session
-    def populate_users_table(pathname, n_clicks):
-        if pathname == '/admin' and current_user.is_authenticated and current_user.is_admin:
-            users = list_all_users()
-            return create_users_table(users)
-        return ''
+    @read_session
+    def populate_users_table(n_clicks, seen_version):
+        if current_user.is_authenticated and current_user.is_admin:
+            version = get_users_version()
+            if version == seen_version:
+                return dash.no_update, dash.no_update
+            return render_users_table(), version
+        return '', None
     
     # Callback to enable/disable action buttons based on row selection
     @app.callback(
         [Output('delete-selected-button', 'disabled'),
          Output('promote-selected-button', 'disabled'),
-         Output('selected-user-id', 'data')],
+         Output('selected-user-ids', 'data')],
         [Input('users-table', 'selected_rows')],
-        [State('users-table', 'data')]
+        [State('users-table', 'data')],
+        prevent_initial_call=True
     )
     def update_action_buttons(selected_rows, table_data):
         if not selected_rows:
-            return True, True, None
+            return True, True, []
         
-        selected_row = selected_rows[0]  # Get the first selected row
-        selected_user = table_data[selected_row]
-        selected_user_id = selected_user['id']
-        is_admin = selected_user['type'] == 'Admin'
-        is_current_user = current_user.id == selected_user_id
+        # The current user is never part of a batch
+        selected_users = [table_data[row] for row in selected_rows
+                          if table_data[row]['id'] != current_user.id]
+        selected_user_ids = [user['id'] for user in selected_users]
         
-        # Both buttons disabled if current user is selected
-        if is_current_user:
-            return True, True, selected_user_id
-            
-        # Promote button disabled if user is already admin
-        return False, is_admin, selected_user_id
+        # Promote button disabled if every selected user is already admin
+        can_promote = any(user['type'] != 'Admin' for user in selected_users)
+        return not selected_user_ids, not can_promote, selected_user_ids
     
-    # Delete user callback
+    # Delete users callback (one confirmation for the whole batch)
     @app.callback(
         [Output('delete-user-modal', 'is_open'),
          Output('admin-message', 'children', allow_duplicate=True)],
@@ -58,11 +90,11 @@ def register_admin_callbacks(app):
          Input('confirm-delete-user', 'n_clicks'),
          Input('cancel-delete-user', 'n_clicks')],
         [State('delete-user-modal', 'is_open'),
-         State('selected-user-id', 'data')],
+         State('selected-user-ids', 'data')],
         prevent_initial_call=True
     )
-    @db_session
-    def handle_delete_user(delete_clicks, confirm_clicks, cancel_clicks, is_open, user_id):
+    @write_session
+    def handle_delete_user(delete_clicks, confirm_clicks, cancel_clicks, is_open, user_ids):
         ctx = dash.callback_context
         if not ctx.triggered:
             return is_open, dash.no_update
@@ -76,14 +108,24 @@ def register_admin_callbacks(app):
             return False, dash.no_update
             
         if trigger_id == 'confirm-delete-user' and confirm_clicks:
-            if user_id and delete_user(user_id):
-                return False, dbc.Alert('User deleted successfully', color='success')
+            if not user_ids or not current_user.is_admin:
+                return False, dbc.Alert('Failed to delete users', color='danger')
+            
+            started = time.perf_counter()
+            deleted = delete_users([user_id for user_id in user_ids if user_id != current_user.id])
+            elapsed = (time.perf_counter() - started) * 1000
+            if deleted['users']:
+                return False, dbc.Alert(
+                    f"Deleted {deleted['users']} users, {deleted['projects']} projects and "
+                    f"{deleted['memberships']} memberships in {elapsed:.0f} ms",
+                    color='success'
+                )
             else:
-                return False, dbc.Alert('Failed to delete user', color='danger')
+                return False, dbc.Alert('Failed to delete users', color='danger')
                 
         return is_open, dash.no_update
     
-    # Promote user callback
+    # Promote users callback (one confirmation for the whole batch)
     @app.callback(
         [Output('promote-user-modal', 'is_open'),
          Output('admin-message', 'children', allow_duplicate=True)],
@@ -91,11 +133,11 @@ def register_admin_callbacks(app):
          Input('confirm-promote-user', 'n_clicks'),
          Input('cancel-promote-user', 'n_clicks')],
         [State('promote-user-modal', 'is_open'),
-         State('selected-user-id', 'data')],
+         State('selected-user-ids', 'data')],
         prevent_initial_call=True
     )
-    @db_session
-    def handle_promote_user(promote_clicks, confirm_clicks, cancel_clicks, is_open, user_id):
+    @write_session
+    def handle_promote_user(promote_clicks, confirm_clicks, cancel_clicks, is_open, user_ids):
         ctx = dash.callback_context
         if not ctx.triggered:
             return is_open, dash.no_update
@@ -109,9 +151,36 @@ def register_admin_callbacks(app):
             return False, dash.no_update
             
         if trigger_id == 'confirm-promote-user' and confirm_clicks:
-            if user_id and promote_user_to_admin(user_id):
-                return False, dbc.Alert('User promoted to admin successfully', color='success')
+            if not user_ids or not current_user.is_admin:
+                return False, dbc.Alert('Failed to promote users', color='danger')
+            
+            started = time.perf_counter()
+            promoted = promote_users_to_admin(user_ids)
+            elapsed = (time.perf_counter() - started) * 1000
+            if promoted:
+                return False, dbc.Alert(f'Promoted {promoted} users to admin in {elapsed:.0f} ms', color='success')
             else:
-                return False, dbc.Alert('Failed to promote user', color='danger')
+                return False, dbc.Alert('Failed to promote users', color='danger')
                 
-        return is_open, dash.no_update
\ No newline at end of file
+        return is_open, dash.no_update
+    
+    # Callback to page through the audit log (keyset pagination on the event id)
+    @app.callback(
+        [Output('audit-table-container', 'children'),
+         Output('audit-page-bounds', 'data'),
+         Output('audit-newer-button', 'disabled'),
+         Output('audit-older-button', 'disabled')],
+        [Input('audit-latest-button', 'n_clicks'),
+         Input('audit-newer-button', 'n_clicks'),
+         Input('audit-older-button', 'n_clicks')],
+        [State('audit-page-bounds', 'data')],
+        prevent_initial_call=True
+    )
+    @read_session
+    def page_audit_log(latest_clicks, newer_clicks, older_clicks, bounds):
+        if not current_user.is_authenticated or not current_user.is_admin:
+            return '', None, True, True
+        
+        ctx = dash.callback_context
+        trigger_id = ctx.triggered[0]['prop_id'].split('.')[0] if ctx.triggered else None
+        return render_audit_page(trigger_id, bounds)
@@ -3,9 +3,8 @@ import dash
 from dash.dependencies import Input, Output, State
 import dash_bootstrap_components as dbc
 from flask_login import login_user, logout_user, current_user
-from pony.orm import db_session
 
-from model import validate_user, add_user, get_user_by_username
+from model import validate_user, add_user, read_session, write_session
 
 def register_auth_callbacks(app):
     """Register authentication-related callbacks"""
@@ -19,7 +18,7 @@ def register_auth_callbacks(app):
          State('login-password', 'value')],
         prevent_initial_call=True
     )
-    @db_session
+    @read_session
     def login_callback(n_clicks, username, password):
         if not n_clicks or not username or not password:
             return '', dash.no_update
@@ -42,7 +41,7 @@ def register_auth_callbacks(app):
          State('register-email', 'value')],
         prevent_initial_call=True
     )
-    @db_session
+    @write_session
     def register_callback(n_clicks, username, password, confirm_password, email):
         if not n_clicks or not username or not password or not confirm_password:
             return '', dash.no_update
@@ -54,19 +53,4 @@ def register_auth_callbacks(app):
         if add_user(username, password, email):
             return dbc.Alert('Registration successful! Please log in.', color='success'), '/login'
         else:
-            return dbc.Alert('Username already exists', color='danger'), dash.no_update
-    
-    # Callback to display user info on profile page
-    @app.callback(
-        Output('user-info', 'children'),
-        Input('url', 'pathname')
-    )
-    @db_session
-    def display_user_info(pathname):
-        if pathname == '/profile' and current_user.is_authenticated:
-            # Get fresh user data from database
-            from view import create_user_info_display
-            user = get_user_by_username(current_user.username)
-            if user:
-                return create_user_info_display(user.username, user.email, user.is_admin)
-        return ''
\ No newline at end of file
+            return dbc.Alert('Username already exists', color='danger'), dash.no_update
\ No newline at end of file
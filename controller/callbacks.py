@@ -8,20 +8,13 @@ def register_callbacks(app):
     from .admin import register_admin_callbacks
     from .projects import register_project_callbacks
     from .project_detail import register_project_detail_callbacks
+    from .search import register_search_callbacks
     from .routing import register_routing_callbacks
     
-    # Register navbar callback (kept here since it's simple)
-    @app.callback(
-        dash.Output('navbar-container', 'children'),
-        dash.Input('url', 'pathname')
-    )
-    def update_navbar(pathname):
-        from view import get_navbar
-        return get_navbar()
-    
     # Register callbacks from each module
     register_auth_callbacks(app)
     register_admin_callbacks(app)
     register_project_callbacks(app)
     register_project_detail_callbacks(app)
+    register_search_callbacks(app)
     register_routing_callbacks(app)
\ No newline at end of file
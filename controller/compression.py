@@ -0,0 +1,197 @@
+# controller/compression.py
+import collections
+import gzip
+import hashlib
+import os
+import threading
+import time
+from flask import abort, jsonify, request
+from flask_login import current_user
+
+try:
+    import brotli
+except ImportError:
+    # Optional (pip install brotli); without it responses are only gzipped
+    brotli = None
+
+# Compress responses here (COMPRESSION=0 when a proxy in front already does)
+COMPRESSION = os.environ.get('COMPRESSION', '1') == '1'
+# Smaller bodies go out as they are: the headers and CPU outweigh the bytes saved
+COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+# Levels favour speed, since callback responses are compressed on every request
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# Compressed bodies kept per process for identical responses (component
+# bundles, unchanged tables), bounded by their total size
+COMPRESS_CACHE_SIZE = 256
+COMPRESS_CACHE_BYTES = 32 * 1024 * 1024
+# Bodies smaller than this are not worth hashing for the cache
+COMPRESS_CACHE_MIN_SIZE = 16 * 1024
+
+# Media types worth compressing; images, fonts and archives already are compressed
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/javascript', 'application/x-javascript',
+    'application/x-ndjson', 'application/xml', 'image/svg+xml'
+)
+
+def _gzip(body):
+    return gzip.compress(body, GZIP_LEVEL, mtime=0)
+
+def _brotli(body):
+    return brotli.compress(body, quality=BROTLI_QUALITY)
+
+ENCODERS = {'gzip': _gzip}
+if brotli is not None:
+    ENCODERS['br'] = _brotli
+
+_metrics_lock = threading.Lock()
+_metrics = {}
+
+def reset_compression_metrics():
+    """Zero the compression counters"""
+    with _metrics_lock:
+        _metrics.clear()
+
+def get_compression_metrics():
+    """Return a snapshot of the compression counters per route
+
+    Dash callbacks are counted per output, the rest per URL rule. For each,
+    bytes_in and bytes_out are the sizes of the compressed responses before
+    and after, ratio is bytes_out / bytes_in, and cpu_time is the thread CPU
+    time spent compressing (in seconds). skipped counts responses that went
+    out as they were: too small, not accepted by the client, or not smaller
+    once compressed.
+    """
+    with _metrics_lock:
+        metrics = {route: dict(counters) for route, counters in _metrics.items()}
+    for counters in metrics.values():
+        counters['ratio'] = counters['bytes_out'] / counters['bytes_in'] if counters['bytes_in'] else 1.0
+        counters['cpu_per_mb'] = counters['cpu_time'] / counters['bytes_in'] * 2**20 if counters['bytes_in'] else 0.0
+    return metrics
+
+def _count(route, **values):
+    with _metrics_lock:
+        counters = _metrics.get(route)
+        if counters is None:
+            counters = _metrics[route] = {
+                'responses': 0, 'compressed': 0, 'skipped': 0, 'cache_hits': 0,
+                'bytes_in': 0, 'bytes_out': 0, 'cpu_time': 0.0
+            }
+        counters['responses'] += 1
+        for key, value in values.items():
+            counters[key] += value
+
+class CompressionCache:
+    """LRU of compressed bodies keyed by encoding and body digest"""
+
+    def __init__(self, max_entries=COMPRESS_CACHE_SIZE, max_bytes=COMPRESS_CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = data
+            self._bytes += len(data)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+_cache = CompressionCache()
+
+def choose_encoding(accept_encodings):
+    """Return the best encoding the client accepts (br before gzip), or None"""
+    for encoding in ('br', 'gzip'):
+        if encoding in ENCODERS and accept_encodings[encoding] > 0:
+            return encoding
+    return None
+
+def is_compressible(response):
+    """True for complete, successful, uncompressed responses of a compressible media type"""
+    return (response.status_code == 200
+            and not response.direct_passthrough
+            and not response.is_streamed
+            and 'Content-Encoding' not in response.headers
+            and 'Content-Range' not in response.headers
+            and response.mimetype.startswith(COMPRESSIBLE_TYPES))
+
+def _route():
+    """Name the current request for the metrics: its URL rule, or the outputs of a Dash callback
+
+    Rules rather than paths keep the counters bounded: the pages' catch-all
+    rule serves any path a client asks for.
+    """
+    if request.path.endswith('/_dash-update-component'):
+        payload = request.get_json(silent=True) or {}
+        return f"callback {payload.get('output', '?')}"
+    return request.url_rule.rule if request.url_rule else '<unmatched>'
+
+def compress_response(response):
+    """Compress a response for the client if it is worth it, from the cache when possible"""
+    if request.method == 'HEAD' or not is_compressible(response):
+        return response
+    route = _route()
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_SIZE:
+        _count(route, skipped=1)
+        return response
+    # Caches must keep the identity and compressed bodies apart
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        _count(route, skipped=1)
+        return response
+
+    key = None
+    data = None
+    cpu_time = 0.0
+    if len(body) >= COMPRESS_CACHE_MIN_SIZE:
+        key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+        data = _cache.get(key)
+    cache_hit = data is not None
+    if not cache_hit:
+        start = time.thread_time()
+        data = ENCODERS[encoding](body)
+        cpu_time = time.thread_time() - start
+        if key is not None:
+            _cache.put(key, data)
+    # Bodies that are mostly compressed media already (base64 images) may not shrink
+    if len(data) >= len(body):
+        _count(route, skipped=1, cpu_time=cpu_time)
+        return response
+    _count(route, compressed=1, cache_hits=int(cache_hit), bytes_in=len(body), bytes_out=len(data),
+           cpu_time=cpu_time)
+
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    # The compressed body is a different representation than the identity one
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f'{etag}-{encoding}', weak)
+    return response
+
+def register_compression(server):
+    """Compress the server's responses and register the route that reports on it"""
+    if COMPRESSION:
+        server.after_request(compress_response)
+
+    # Route to report the compression ratio and CPU cost per route, for admins
+    @server.route('/metrics/compression')
+    def compression_metrics():
+        if not current_user.is_authenticated or not current_user.is_admin:
+            abort(403)
+        return jsonify(encoders=sorted(ENCODERS), min_size=COMPRESS_MIN_SIZE,
+                       routes=get_compression_metrics())
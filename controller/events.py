@@ -0,0 +1,95 @@
+# controller/events.py
+import json
+import os
+from flask import Response, abort, request
+from flask_login import current_user
+
+from model import (
+    subscribe_changes, unsubscribe_changes, change_subscriber_count, is_project_visible, get_visible_project_ids
+)
+
+# Open change streams allowed per process; beyond it clients get a 503 and
+# poll for changes instead. Each open stream holds a server thread
+# (or a greenlet with gevent workers)
+EVENT_STREAMS = int(os.environ.get('EVENT_STREAMS', 1000))
+# Seconds between keepalive comments on an idle stream, which also detect
+# clients that went away
+EVENT_KEEPALIVE = 15
+# Milliseconds the browser waits before reconnecting a dropped stream
+EVENT_RETRY = 3000
+
+# Actions that can make a project visible to a user, or hide it from them
+VISIBILITY_ACTIONS = (
+    'project.create', 'project.add_member', 'project.add_members',
+    'project.remove_member', 'project.remove_members'
+)
+
+class ProjectVisibility:
+    """Which projects' changes one user's stream may carry: the ones they manage or are a member of
+
+    The user's projects are read when the stream opens, so a project they
+    had is still known after it is deleted or they leave it. Other projects
+    are checked in the database the first time one of their changes
+    arrives, and any project again after changes that can alter its
+    visibility.
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self._visible = dict.fromkeys(get_visible_project_ids(user_id), True)
+
+    def allows(self, change):
+        project_id = change['project_id']
+        # Changes to any project (and reloads) name none
+        if project_id is None:
+            return True
+        known = project_id in self._visible
+        if known and change['action'] not in VISIBILITY_ACTIONS:
+            return self._visible[project_id]
+        was_visible = self._visible.get(project_id, False)
+        self._visible[project_id] = is_project_visible(project_id, self.user_id)
+        # A user who just lost a project still hears about it, so their page drops it
+        return was_visible or self._visible[project_id]
+
+def format_change(change):
+    """Encode a project change as a Server-Sent Event"""
+    data = json.dumps({'id': change['id'], 'project_id': change['project_id'], 'action': change['action']})
+    return f"id: {change['id']}\ndata: {data}\n\n"
+
+def change_stream(subscription, visibility=None):
+    """Yield a subscription's changes as they arrive, only those visibility allows if given"""
+    yield f'retry: {EVENT_RETRY}\n\n'
+    while True:
+        changes = subscription.wait(EVENT_KEEPALIVE)
+        if not changes:
+            yield ': keepalive\n\n'
+        for change in changes:
+            if visibility is None or visibility.allows(change):
+                yield format_change(change)
+
+def register_event_routes(server):
+    """Register the Flask route that streams project changes"""
+
+    # Route to stream project changes as Server-Sent Events, for one project with ?project=<id>
+    @server.route('/events/projects')
+    def project_events():
+        if not current_user.is_authenticated:
+            abort(401)
+        if change_subscriber_count() >= EVENT_STREAMS:
+            abort(503)
+
+        project_id = request.args.get('project', type=int)
+        # Admins hear about every project, everyone else about their own
+        visibility = None if current_user.is_admin else ProjectVisibility(current_user.id)
+        if project_id is not None and visibility is not None and not is_project_visible(project_id, current_user.id):
+            abort(403)
+        # Sent by the browser when it reconnects, so missed changes are replayed
+        last_id = request.headers.get('Last-Event-ID', type=int)
+        subscription = subscribe_changes(project_id, last_id)
+        response = Response(change_stream(subscription, visibility), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
+        # The server closes the response when the client goes away
+        response.call_on_close(lambda: unsubscribe_changes(subscription))
+        return response
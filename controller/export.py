@@ -0,0 +1,80 @@
+# controller/export.py
+import csv
+import io
+import json
+import zlib
+from flask import Response, abort, redirect, request
+from flask_login import current_user
+
+from model import EXPORT_COLUMNS, export_projects, export_memberships, export_users
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+def csv_chunks(columns, chunks):
+    """Encode row chunks as CSV, one bytes block per chunk"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    # Header of an empty export
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+def ndjson_chunks(columns, chunks):
+    """Encode row chunks as newline-delimited JSON objects"""
+    for rows in chunks:
+        yield ''.join(
+            json.dumps(dict(zip(columns, row)), default=str) + '\n' for row in rows
+        ).encode('utf-8')
+
+def gzip_chunks(blocks):
+    """Gzip a stream of bytes blocks on the fly"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for block in blocks:
+        data = compressor.compress(block)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def register_export_routes(server):
+    """Register the Flask routes that stream exports"""
+
+    # Route to stream an export as CSV or NDJSON, gzipped with ?gzip=1
+    @server.route('/export/<dataset>.<fmt>')
+    def export_dataset(dataset, fmt):
+        if not current_user.is_authenticated:
+            return redirect('/login')
+        if dataset not in EXPORT_COLUMNS or fmt not in EXPORT_FORMATS:
+            abort(404)
+
+        # Admins export everything; other users only see their own projects
+        scope = None if current_user.is_admin else current_user.id
+        if dataset == 'users':
+            if not current_user.is_admin:
+                abort(403)
+            chunks = export_users()
+        elif dataset == 'projects':
+            chunks = export_projects(scope)
+        else:
+            chunks = export_memberships(scope)
+
+        columns = EXPORT_COLUMNS[dataset]
+        encode = csv_chunks if fmt == 'csv' else ndjson_chunks
+        body = encode(columns, chunks)
+        filename = f'{dataset}.{fmt}'
+        mimetype = EXPORT_FORMATS[fmt]
+        if request.args.get('gzip'):
+            body = gzip_chunks(body)
+            filename += '.gz'
+            mimetype = 'application/gzip'
+
+        return Response(body, mimetype=mimetype, headers={
+            'Content-Disposition': f'attachment; filename="{filename}"'
+        })
@@ -4,249 +4,290 @@ import dash
 from dash.dependencies import Input, Output, State, ALL
 import dash_bootstrap_components as dbc
 from dash import html
-import json
-from pony.orm import db_session
+from pony.orm import select
 from datetime import datetime
+import time
 from flask_login import current_user
 
 from model import (
     get_project, add_member_to_project,
     remove_member_from_project, close_project, list_all_users,
-    delete_project, update_dot_graph
+    delete_project, update_dot_graph, get_dot_graph, list_dot_revisions,
+    get_dot_revision, diff_dot_revisions, search_users, add_members_to_project,
+    remove_members_from_project, get_project_version, is_project_visible, read_session, write_session
 )
+from view import create_revision_options, create_dot_diff_display
+from .projects import render_add_member_form
+
+def open_add_member_modal(index, project_id):
+    """Opens the add member modal with its form filled in"""
+    return {'add-member-modal': True, 'add-member-content': render_add_member_form(index),
+            'selected-project-id': index}
+
+def open_close_project_modal(index, project_id):
+    """Opens the close project modal"""
+    return {'close-project-modal': True, 'selected-project-id': index}
+
+def open_delete_project_modal(index, project_id):
+    """Opens the delete project confirmation"""
+    return {'delete-project-modal': True, 'selected-project-id': index}
+
+def remove_member(index, project_id):
+    """Removes the member whose button was clicked from the displayed project"""
+    if remove_member_from_project(project_id, index):
+        return {'project-message': dbc.Alert('Member removed successfully', color='success')}
+    return {'project-message': dbc.Alert('Failed to remove member', color='danger')}
+
+# Handlers of the pattern-matching buttons by the 'type' of their id. Each
+# takes the button's index and the displayed project id and returns the
+# outputs it changes, keyed by component id
+PROJECT_ACTIONS = {
+    'add-member': open_add_member_modal,
+    'close-project': open_close_project_modal,
+    'delete-project': open_delete_project_modal,
+    'remove-member': remove_member
+}
+ACTION_OUTPUTS = ('add-member-modal', 'add-member-content', 'close-project-modal',
+                  'delete-project-modal', 'selected-project-id', 'project-message')
+
+def can_view_project(project_id):
+    """Check that the current user may see a project's graph: admins, its manager and its members
+
+    The project id comes from the client, so it is checked on every request.
+    """
+    if not current_user.is_authenticated:
+        return False
+    return current_user.is_admin or is_project_visible(project_id, current_user.id)
 
 def register_project_detail_callbacks(app):
     """Register callbacks for project detail page"""
     
-    # Refresh single project view
+    # Refresh single project view, unless the project is still at the version it was rendered at
     @app.callback(
         Output('page-content', 'children', allow_duplicate=True),
         [Input('refresh-project-button', 'n_clicks')],
-        [State('url', 'pathname')],
+        [State('url', 'pathname'),
+         State('project-version', 'data')],
         prevent_initial_call=True
     )
-    @db_session
-    def refresh_project_view(n_clicks, pathname):
+    @read_session
+    def refresh_project_view(n_clicks, pathname, seen_version):
         if not n_clicks or not pathname or not pathname.startswith('/project/'):
             return dash.no_update
             
         try:
             project_id = int(pathname.split('/')[-1])
+            if get_project_version(project_id) == seen_version:
+                return dash.no_update
             from view.project_detail import get_project_detail_layout
             return get_project_detail_layout(project_id)
         except:
             return dash.no_update
     
-    # Toggle add member modal for pattern matching buttons
+    # One request per click on the page's pattern-matching buttons: the
+    # action is looked up by the button's type and only its outputs change
     @app.callback(
-        Output('add-member-modal', 'is_open', allow_duplicate=True),
-        [Input({'type': 'add-member', 'index': ALL}, 'n_clicks')],
-        [State('add-member-modal', 'is_open')],
+        [Output('add-member-modal', 'is_open', allow_duplicate=True),
+         Output('add-member-content', 'children', allow_duplicate=True),
+         Output('close-project-modal', 'is_open', allow_duplicate=True),
+         Output('delete-project-modal', 'is_open', allow_duplicate=True),
+         Output('selected-project-id', 'data', allow_duplicate=True),
+         Output('project-message', 'children', allow_duplicate=True)],
+        [Input({'type': action, 'index': ALL}, 'n_clicks') for action in PROJECT_ACTIONS],
+        [State('url', 'pathname')],
         prevent_initial_call=True
     )
-    def toggle_add_member_modal_pattern(pattern_clicks, is_open):
+    def dispatch_project_action(*args):
+        pathname = args[-1]
         ctx = dash.callback_context
-        if not ctx.triggered:
-            return is_open
-            
-        trigger = ctx.triggered[0]['prop_id'].split('.')[0]
+        button = ctx.triggered_id
+        # Only a click counts, not buttons appearing with a re-rendered page
+        if (not isinstance(button, dict) or not ctx.triggered[0]['value'] or not current_user.is_authenticated
+                or not pathname or not pathname.startswith('/project/')):
+            return [dash.no_update] * len(ACTION_OUTPUTS)
         
-        if '{' in trigger and '"type":"add-member"' in trigger:
-            # For pattern matching, check if any clicks have occurred
-            if any(click and click > 0 for click in pattern_clicks):
-                return True
-                
-        return is_open
-    
-    # Toggle close project modal for pattern matching buttons
-    @app.callback(
-        Output('close-project-modal', 'is_open', allow_duplicate=True),
-        [Input({'type': 'close-project', 'index': ALL}, 'n_clicks')],
-        [State('close-project-modal', 'is_open')],
-        prevent_initial_call=True
-    )
-    def toggle_close_project_modal_pattern(pattern_clicks, is_open):
-        ctx = dash.callback_context
-        if not ctx.triggered:
-            return is_open
-            
-        trigger = ctx.triggered[0]['prop_id'].split('.')[0]
+        updates = PROJECT_ACTIONS[button['type']](button['index'], int(pathname.split('/')[-1]))
+        return [updates.get(output, dash.no_update) for output in ACTION_OUTPUTS]
         
-        if '{' in trigger and '"type":"close-project"' in trigger:
-            # For pattern matching, check if any clicks have occurred
-            if any(click and click > 0 for click in pattern_clicks):
-                return True
-                
-        return is_open
-    
-    # Toggle delete project modal
+    # Delete the project on confirm; the modal closes either way
     @app.callback(
-        Output('delete-project-modal', 'is_open'),
-        [Input({'type': 'delete-project', 'index': ALL}, 'n_clicks'),
-         Input('confirm-delete-project', 'n_clicks'),
+        [Output('delete-project-modal', 'is_open'),
+         Output('url', 'pathname', allow_duplicate=True)],
+        [Input('confirm-delete-project', 'n_clicks'),
          Input('cancel-delete-project', 'n_clicks')],
-        [State('delete-project-modal', 'is_open')],
+        [State('selected-project-id', 'data')],
         prevent_initial_call=True
     )
-    def toggle_delete_project_modal(delete_clicks, confirm, cancel, is_open):
+    def delete_project_callback(confirm, cancel, project_id):
         ctx = dash.callback_context
         if not ctx.triggered:
-            return is_open
-            
-        trigger = ctx.triggered[0]['prop_id'].split('.')[0]
+            return dash.no_update, dash.no_update
         
-        if '{' in trigger and '"type":"delete-project"' in trigger:
-            # For pattern matching, check if any clicks have occurred
-            if any(click and click > 0 for click in delete_clicks):
-                return True
-        elif trigger == 'confirm-delete-project' and confirm:
-            return False
-        elif trigger == 'cancel-delete-project' and cancel:
-            return False
-                
-        return is_open
+        trigger = ctx.triggered[0]['prop_id'].split('.')[0]
+        if trigger == 'confirm-delete-project' and confirm and project_id:
+            # Delete the project and redirect to projects page
+            if delete_project(project_id, current_user.id):
+                return False, '/projects'
+        return False, dash.no_update
     
-    # Update selected project ID for pattern matching buttons
+    # Search users for the bulk add dropdown, keeping the ones already selected
     @app.callback(
-        Output('selected-project-id', 'data', allow_duplicate=True),
-        [Input({'type': 'add-member', 'index': ALL}, 'n_clicks'),
-         Input({'type': 'close-project', 'index': ALL}, 'n_clicks'),
-         Input({'type': 'delete-project', 'index': ALL}, 'n_clicks'),
-         Input({'type': 'remove-member', 'index': ALL}, 'n_clicks')],
-        [State('selected-project-id', 'data')],
+        Output('bulk-add-members', 'options'),
+        [Input('bulk-add-members', 'search_value')],
+        [State('bulk-add-members', 'value'),
+         State('bulk-add-members', 'options'),
+         State('url', 'pathname')],
         prevent_initial_call=True
     )
-    def update_selected_project_id(add_clicks, close_clicks, delete_clicks, remove_clicks, current_project_id):
-        ctx = dash.callback_context
-        if not ctx.triggered:
-            return current_project_id
-            
-        trigger = ctx.triggered[0]['prop_id'].split('.')[0]
-        
-        # Only process if actually triggered by a click
-        if not any(add_clicks) and not any(close_clicks) and not any(delete_clicks) and not any(remove_clicks):
-            return current_project_id
-        
-        # Handle add member buttons from project detail page
-        if '{' in trigger and '"type":"add-member"' in trigger:
-            try:
-                button_data = json.loads(trigger)
-                # Find the index of the button that was clicked
-                for i, click in enumerate(add_clicks):
-                    if click and click > 0:
-                        return button_data['index']
-            except:
-                pass
-                
-        # Handle close project buttons from project detail page
-        if '{' in trigger and '"type":"close-project"' in trigger:
-            try:
-                button_data = json.loads(trigger)
-                # Find the index of the button that was clicked
-                for i, click in enumerate(close_clicks):
-                    if click and click > 0:
-                        return button_data['index']
-            except:
-                pass
-                
-        # Handle delete project buttons from project detail page
-        if '{' in trigger and '"type":"delete-project"' in trigger:
-            try:
-                button_data = json.loads(trigger)
-                # Find the index of the button that was clicked
-                for i, click in enumerate(delete_clicks):
-                    if click and click > 0:
-                        return button_data['index']
-            except:
-                pass
-        
-        # For remove member buttons, we keep the current project ID
-        return current_project_id
+    def search_bulk_members(search_value, selected, options, pathname):
+        if (not search_value or not pathname or not pathname.startswith('/project/')
+                or not current_user.is_authenticated):
+            return dash.no_update
         
-    # Delete project callback
+        project_id = pathname.split('/')[-1]
+        selected = set(selected or [])
+        kept = [option for option in options or [] if option['value'] in selected]
+        found = [{"label": username, "value": user_id}
+                 for user_id, username in search_users(search_value, project_id, current_user.id)
+                 if user_id not in selected]
+        return kept + found
+    
+    # Add all selected users in one transaction
     @app.callback(
-        Output('url', 'pathname', allow_duplicate=True),
-        [Input('confirm-delete-project', 'n_clicks')],
-        [State('selected-project-id', 'data')],
+        [Output('bulk-membership-message', 'children'),
+         Output('bulk-add-members', 'value'),
+         Output('bulk-remove-members', 'options')],
+        [Input('bulk-add-members-button', 'n_clicks')],
+        [State('bulk-add-members', 'value'),
+         State('url', 'pathname')],
         prevent_initial_call=True
     )
-    @db_session
-    def delete_project_callback(n_clicks, project_id):
-        if not n_clicks or not project_id:
-            return dash.no_update
+    @write_session
+    def bulk_add_members_callback(n_clicks, user_ids, pathname):
+        if (not n_clicks or not user_ids or not pathname or not pathname.startswith('/project/')
+                or not current_user.is_authenticated):
+            return dash.no_update, dash.no_update, dash.no_update
         
-        # Delete the project and redirect to projects page
-        if delete_project(project_id, current_user.id):
-            return '/projects'
+        project = get_project(pathname.split('/')[-1])
+        if not project or project.manager.id != current_user.id:
+            return dbc.Alert('Only the project manager can add members', color='danger'), dash.no_update, dash.no_update
         
-        return dash.no_update
+        started = time.perf_counter()
+        added = add_members_to_project(project.id, user_ids)
+        elapsed = (time.perf_counter() - started) * 1000
+        members = [{"label": username, "value": user_id}
+                   for user_id, username in select((u.id, u.username) for u in project.members).order_by(2)]
+        return dbc.Alert(f'Added {added} of {len(user_ids)} selected users in {elapsed:.0f} ms', color='success'), [], members
     
-    # Remove member from project
+    # Remove all selected members in one transaction
     @app.callback(
-        Output('project-message', 'children', allow_duplicate=True),
-        [Input({'type': 'remove-member', 'index': ALL}, 'n_clicks')],
-        [State('selected-project-id', 'data')],
+        [Output('bulk-membership-message', 'children', allow_duplicate=True),
+         Output('bulk-remove-members', 'value'),
+         Output('bulk-remove-members', 'options', allow_duplicate=True)],
+        [Input('bulk-remove-members-button', 'n_clicks')],
+        [State('bulk-remove-members', 'value'),
+         State('url', 'pathname')],
         prevent_initial_call=True
     )
-    @db_session
-    def remove_member_callback(remove_clicks, project_id):
-        ctx = dash.callback_context
-        if not ctx.triggered or not any(remove_clicks) or not project_id:
-            return dash.no_update
-            
-        trigger = ctx.triggered[0]['prop_id'].split('.')[0]
-        try:
-            button_data = json.loads(trigger)
-            user_id = button_data['index']
-            
-            # Find the index of the button that was clicked
-            for i, click in enumerate(remove_clicks):
-                if click and click > 0:
-                    if remove_member_from_project(project_id, user_id):
-                        return dbc.Alert('Member removed successfully', color='success')
-                    else:
-                        return dbc.Alert('Failed to remove member', color='danger')
-        except:
-            return dbc.Alert('An error occurred', color='danger')
+    @write_session
+    def bulk_remove_members_callback(n_clicks, user_ids, pathname):
+        if (not n_clicks or not user_ids or not pathname or not pathname.startswith('/project/')
+                or not current_user.is_authenticated):
+            return dash.no_update, dash.no_update, dash.no_update
+        
+        project = get_project(pathname.split('/')[-1])
+        if not project or project.manager.id != current_user.id:
+            return dbc.Alert('Only the project manager can remove members', color='danger'), dash.no_update, dash.no_update
+        
+        started = time.perf_counter()
+        removed = remove_members_from_project(project.id, user_ids)
+        elapsed = (time.perf_counter() - started) * 1000
+        members = [{"label": username, "value": user_id}
+                   for user_id, username in select((u.id, u.username) for u in project.members).order_by(2)]
+        return dbc.Alert(f'Removed {removed} members in {elapsed:.0f} ms', color='success'), [], members
     
-    # Save DOT graph changes
+    # Save DOT graph changes (each save becomes a new revision)
     @app.callback(
-        Output('dot-graph-message', 'children'),
+        [Output('dot-graph-message', 'children'),
+         Output('dot-revision-select', 'options'),
+         Output('dot-revision-select', 'value'),
+         Output('dot-compare-select', 'options'),
+         Output('dot-editor-saved', 'data')],
         [Input('save-dot-graph', 'n_clicks')],
         [State('dot-editor', 'value'),
          State('dot-editor-project-id', 'children')],  # Use the dedicated hidden div for project ID
         prevent_initial_call=True
     )
-    @db_session
+    @write_session
     def save_dot_graph(n_clicks, dot_graph, project_id):
 
         print(f"Saving DOT graph for project {project_id} by user {current_user.id} with graph: {dot_graph}")
 
         if not n_clicks or not project_id:
-            return dash.no_update
+            return dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update
             
         if update_dot_graph(project_id, current_user.id, dot_graph):
-            return dbc.Alert('Graph saved successfully', color='success')
+            options = create_revision_options(list_dot_revisions(project_id))
+            latest = options[0]['value'] if options else None
+            return dbc.Alert('Graph saved successfully', color='success'), options, latest, options, dot_graph
         else:
-            return dbc.Alert('Failed to save graph', color='danger')
+            return dbc.Alert('Failed to save graph', color='danger'), dash.no_update, dash.no_update, dash.no_update, dash.no_update
+    
+    # Load a past revision into the editor (it is stored again only when saved)
+    @app.callback(
+        Output('dot-editor', 'value', allow_duplicate=True),
+        [Input('load-dot-revision', 'n_clicks')],
+        [State('dot-revision-select', 'value'),
+         State('dot-editor-project-id', 'children')],
+        prevent_initial_call=True
+    )
+    @read_session
+    def load_dot_revision(n_clicks, number, project_id):
+        if not n_clicks or not number or not project_id or not can_view_project(project_id):
+            return dash.no_update
+        
+        dot_graph = get_dot_revision(project_id, number)
+        if dot_graph is None:
+            return dash.no_update
+        return dot_graph
+    
+    # Structural diff between two revisions
+    @app.callback(
+        Output('dot-revision-diff', 'children'),
+        [Input('compare-dot-revisions', 'n_clicks')],
+        [State('dot-compare-select', 'value'),
+         State('dot-revision-select', 'value'),
+         State('dot-editor-project-id', 'children')],
+        prevent_initial_call=True
+    )
+    @read_session
+    def compare_dot_revisions(n_clicks, from_number, to_number, project_id):
+        if not n_clicks or not from_number or not to_number or not project_id or not can_view_project(project_id):
+            return dash.no_update
+        
+        diff = diff_dot_revisions(project_id, from_number, to_number)
+        if diff is None:
+            return dbc.Alert('Revision not found', color='danger')
+        return create_dot_diff_display(diff)
     
     # Revert DOT graph to saved version
     @app.callback(
-        Output('dot-editor', 'value'),
+        [Output('dot-editor', 'value'),
+         Output('dot-editor-saved', 'data', allow_duplicate=True)],
         [Input('revert-dot-graph', 'n_clicks')],
         [State('dot-editor-project-id', 'children')],  # Use the dedicated hidden div
         prevent_initial_call=True
     )
-    @db_session
+    @read_session
     def revert_dot_graph(n_clicks, project_id):
         if not n_clicks or not project_id:
-            return dash.no_update
+            return dash.no_update, dash.no_update
             
-        project = get_project(project_id)
-        if project and hasattr(project, 'dot_graph'):
-            return project.dot_graph
+        dot_graph = get_dot_graph(project_id)
+        if dot_graph is not None:
+            return dot_graph, dot_graph
             
-        return dash.no_update
+        return dash.no_update, dash.no_update
     
     # Generate and display DOT graph
     @app.callback(
@@ -337,7 +378,7 @@ def register_project_detail_callbacks(app):
         [State('dot-editor-project-id', 'children')],  # Use the dedicated hidden div
         prevent_initial_call=True
     )
-    @db_session
+    @read_session
     def update_graph_after_save(save_clicks, refresh_clicks, project_id):
         import tempfile
         import base64
@@ -348,13 +389,11 @@ def register_project_detail_callbacks(app):
         if not ctx.triggered or not project_id:
             return dash.no_update
         
-        # Get project data
-        project = get_project(project_id)
-        if not project or not hasattr(project, 'dot_graph') or not project.dot_graph:
+        # Get the saved graph source
+        dot_graph = get_dot_graph(project_id)
+        if not dot_graph:
             return dash.no_update
             
-        dot_graph = project.dot_graph
-            
         # Create a temporary dot file
         try:
             # Create temporary files for input and output
@@ -1,51 +1,155 @@
 # controller/projects.py
 
 import dash
-from dash.dependencies import Input, Output, State, ALL
+from dash.dependencies import Input, Output, State, ALL, ClientsideFunction
 import dash_bootstrap_components as dbc
-from dash import html
+from dash import html, Patch
 import json
-from pony.orm import db_session
 from datetime import datetime
 from flask_login import current_user
 
 from model import (
-    create_project, get_project, get_user_managed_projects, 
-    get_user_member_projects, add_member_to_project
+    create_project, get_project, get_project_record, get_managed_project_records,
+    get_member_project_records, add_member_to_project, get_project_member_names,
+    is_project_member, is_project_visible, get_project_list_version, search_users,
+    read_session, write_session, MEMBER_SEARCH_LIMIT
 )
-from view import create_projects_table
+from view import (
+    create_projects_table, create_project_row, create_project_members_details, get_project_detail_layout
+)
+
+# Wildcard output for the projects tab containers; it matches nothing when the
+# projects page is not displayed, so mutations from other pages stay valid
+PROJECTS_CONTAINERS = Output({'type': 'projects-container', 'tab': ALL}, 'children', allow_duplicate=True)
+
+def container_updates(updates):
+    """Returns the wildcard output values that apply updates, keyed by tab, to those tabs only"""
+    return [updates.get(output['id']['tab'], dash.no_update)
+            for output in dash.callback_context.outputs_list[0]]
+
+def managed_container_update(update):
+    """Returns the wildcard output values that apply an update to the managed tab only"""
+    return container_updates({'managed': update})
+
+def selected_row_index(project_id, selected_rows, selected_row_ids):
+    """Returns the managed table index of the selected row if it holds the given project"""
+    if not selected_rows or not selected_row_ids:
+        return None
+    if str(selected_row_ids[0]) != str(project_id):
+        return None
+    return selected_rows[0]
+
+def render_project_tab(tab):
+    """Returns the content of a projects tab ('managed' or 'member') for the current user"""
+    if tab == 'managed':
+        # Get projects the user manages
+        managed_projects = get_managed_project_records(current_user.id)
+        if not managed_projects:
+            return html.P("You don't have any projects yet. Create one using the button above.")
+        return create_projects_table(managed_projects, True)
+    # Get projects the user is a member of
+    member_projects = get_member_project_records(current_user.id)
+    if not member_projects:
+        return html.P("You are not a member of any projects yet.")
+    return create_projects_table(member_projects, False)
+
+@read_session
+def render_add_member_form(project_id):
+    """Returns the add member form with a search box and the first page of candidates"""
+    project = get_project(project_id)
+    if not project:
+        return html.P("Project not found")
+    
+    candidates = search_users('', project_id, current_user.id)
+    return html.Div([
+        html.P(f"Add a member to project: {project.name}"),
+        dbc.Label("Search Users"),
+        dbc.Input(id="member-search", type="text", placeholder="Type the start of a username",
+                  debounce=300, className="mb-2"),
+        dbc.Label("Select User"),
+        dbc.Select(
+            id="member-select",
+            options=[{"label": username, "value": user_id} for user_id, username in candidates],
+            value=candidates[0][0] if candidates else None
+        ),
+        html.Small(f"Showing up to {MEMBER_SEARCH_LIMIT} matches", className="text-muted")
+    ])
+
+def project_change_updates(project_id, loaded_tabs, managed_ids, member_ids):
+    """Returns the updates, keyed by tab, that bring a changed project's row up to date
+
+    Only the changed project is fetched. Its row is patched in place or
+    appended; a tab is rendered again when the row has to go (so the
+    selection does not shift to another row) or replaces the placeholder.
+    Tabs that were not loaded yet are left alone.
+    """
+    project = get_project_record(project_id)
+    updates = {}
+    for tab, row_ids in (('managed', managed_ids), ('member', member_ids)):
+        if tab not in (loaded_tabs or []):
+            continue
+        if project is None:
+            belongs = False
+        elif tab == 'managed':
+            belongs = project.manager == current_user.username
+        else:
+            belongs = is_project_member(project_id, current_user.id)
+        
+        if row_ids is None:
+            # No table on screen: only a project that belongs there needs one
+            if belongs:
+                updates[tab] = render_project_tab(tab)
+        elif project_id in row_ids:
+            if belongs:
+                updates[tab] = Patch()
+                updates[tab]['props']['data'][row_ids.index(project_id)] = create_project_row(project)
+            else:
+                updates[tab] = render_project_tab(tab)
+        elif belongs:
+            updates[tab] = Patch()
+            updates[tab]['props']['data'].append(create_project_row(project))
+    return updates
 
 def register_project_callbacks(app):
     """Register project management related callbacks"""
     
-    # Load projects data
+    # Load projects data for the active tab only; tabs that were already
+    # rendered keep their content until a mutation or a refresh invalidates it.
+    # The managed tab comes with the page itself (see routing). Both are
+    # rendered at a version of the user's project list, and a refresh or a
+    # tab switch that finds the same version sends nothing back
     @app.callback(
-        [Output('managed-projects-container', 'children'),
-        Output('member-projects-container', 'children')],
-        [Input('url', 'pathname'),
-        Input('refresh-projects-button', 'n_clicks')]
+        [Output({'type': 'projects-container', 'tab': 'managed'}, 'children'),
+        Output({'type': 'projects-container', 'tab': 'member'}, 'children'),
+        Output('loaded-project-tabs', 'data'),
+        Output('projects-version', 'data')],
+        [Input('projects-tabs', 'active_tab'),
+        Input('refresh-projects-button', 'n_clicks')],
+        [State('loaded-project-tabs', 'data'),
+        State('projects-version', 'data')],
+        prevent_initial_call=True
     )
-    @db_session
-    def load_projects(pathname, n_clicks):
-        # Check if we're on the projects page or a refresh was clicked
-        if (pathname != '/projects' and not n_clicks) or not current_user.is_authenticated:
-            return dash.no_update, dash.no_update
-            
-        # Get projects the user manages
-        managed_projects = get_user_managed_projects(current_user.id)
-        if not managed_projects:
-            managed_content = html.P("You don't have any projects yet. Create one using the button above.")
-        else:
-            managed_content = create_projects_table(managed_projects, True)
-            
-        # Get projects the user is a member of
-        member_projects = get_user_member_projects(current_user.id)
-        if not member_projects:
-            member_content = html.P("You are not a member of any projects yet.")
+    @read_session
+    def load_projects(active_tab, n_clicks, loaded_tabs, seen_version):
+        if not active_tab or not current_user.is_authenticated:
+            return dash.no_update, dash.no_update, dash.no_update, dash.no_update
+        
+        version = get_project_list_version(current_user.id)
+        ctx = dash.callback_context
+        trigger_id = ctx.triggered[0]['prop_id'].split('.')[0] if ctx.triggered else ''
+        if version == seen_version and (trigger_id != 'projects-tabs' or active_tab in (loaded_tabs or [])):
+            return dash.no_update, dash.no_update, dash.no_update, dash.no_update
+        # A changed list (or the refresh button) starts a fresh cache
+        if trigger_id != 'projects-tabs' or version != seen_version:
+            loaded_tabs = []
+        
+        managed_content = member_content = dash.no_update
+        if active_tab == 'managed':
+            managed_content = render_project_tab('managed')
         else:
-            member_content = create_projects_table(member_projects, False)
+            member_content = render_project_tab('member')
             
-        return managed_content, member_content
+        return managed_content, member_content, (loaded_tabs or []) + [active_tab], version
     
     # Enable/disable action buttons based on project selection
     @app.callback(
@@ -54,7 +158,8 @@ def register_project_callbacks(app):
          Output('close-project-button', 'disabled'),
          Output('selected-project-id', 'data')],
         [Input('projects-table', 'selected_rows')],
-        [State('projects-table', 'data')]
+        [State('projects-table', 'data')],
+        prevent_initial_call=True
     )
     def update_project_buttons(selected_rows, table_data):
         if not selected_rows or not table_data:
@@ -69,6 +174,34 @@ def register_project_callbacks(app):
         # Add Member and Close Project buttons are only enabled for active projects
         return False, not is_active, not is_active, project_id
     
+    # Show the members of the active or selected project row on demand
+    @app.callback(
+        Output('project-members-details', 'children'),
+        [Input('projects-table', 'active_cell', allow_optional=True),
+         Input('projects-table', 'selected_row_ids', allow_optional=True),
+         Input('member-projects-table', 'active_cell', allow_optional=True),
+         Input('member-projects-table', 'selected_row_ids', allow_optional=True)],
+        prevent_initial_call=True
+    )
+    @read_session
+    def show_project_members(managed_cell, managed_selected, member_cell, member_selected):
+        ctx = dash.callback_context
+        if not ctx.triggered or not current_user.is_authenticated:
+            return dash.no_update
+        
+        value = ctx.triggered[0]['value']
+        if isinstance(value, dict):
+            project_id = value.get('row_id')
+        else:
+            project_id = value[0] if value else None
+        if project_id is None:
+            return dash.no_update
+        # The row id comes from the client: only members of projects the user can see are shown
+        if not current_user.is_admin and not is_project_visible(project_id, current_user.id):
+            return dash.no_update
+        
+        return create_project_members_details(project_id, get_project_member_names(project_id))
+    
     # Create project modal toggle
     @app.callback(
         Output('create-project-modal', 'is_open'),
@@ -94,17 +227,21 @@ def register_project_callbacks(app):
             
         return is_open
     
-    # Create new project
+    # Create new project and append its row to the managed projects table
     @app.callback(
-        Output('project-message', 'children'),
+        [PROJECTS_CONTAINERS,
+         Output('project-message', 'children'),
+         Output('loaded-project-tabs', 'data', allow_duplicate=True)],
         [Input('confirm-create-project', 'n_clicks')],
         [State('project-name', 'value'),
-         State('project-start-date', 'value')]
+         State('project-start-date', 'value'),
+         State('projects-table', 'selected_rows', allow_optional=True)],
+        prevent_initial_call=True
     )
-    @db_session
-    def create_new_project(n_clicks, name, start_date):
+    @write_session
+    def create_new_project(n_clicks, name, start_date, selected_rows):
         if not n_clicks or not name or not start_date:
-            return dash.no_update
+            return managed_container_update(dash.no_update), dash.no_update, dash.no_update
             
         start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
         
@@ -112,10 +249,17 @@ def register_project_callbacks(app):
         project_id = create_project(name, start_date_obj, current_user.id)
         print(f"Project creation result: {project_id}")
         
-        if project_id:
-            return dbc.Alert('Project created successfully', color='success')
+        if not project_id:
+            return managed_container_update(dash.no_update), dbc.Alert('Failed to create project', color='danger'), dash.no_update
+        
+        project = get_project_record(project_id)
+        if selected_rows is None:
+            # No table rendered yet (empty placeholder), so render it with the new row
+            update = create_projects_table([project], True)
         else:
-            return dbc.Alert('Failed to create project', color='danger')
+            update = Patch()
+            update['props']['data'].append(create_project_row(project))
+        return managed_container_update(update), dbc.Alert('Project created successfully', color='success'), dash.no_update
     
     # Handle view project button
     @app.callback(
@@ -129,84 +273,77 @@ def register_project_callbacks(app):
             return f'/project/{project_id}'
         return dash.no_update
     
-    # Toggle add member modal from projects page
+    # Toggle add member modal from projects page, filling in its form when it opens
     @app.callback(
-        Output('add-member-modal', 'is_open'),
+        [Output('add-member-modal', 'is_open'),
+         Output('add-member-content', 'children')],
         [Input('add-member-button', 'n_clicks'),
          Input('confirm-add-member', 'n_clicks'),
          Input('cancel-add-member', 'n_clicks')],
-        [State('add-member-modal', 'is_open')],
+        [State('add-member-modal', 'is_open'),
+         State('selected-project-id', 'data')],
         prevent_initial_call=True
     )
-    def toggle_add_member_modal(add_clicks, confirm, cancel, is_open):
+    def toggle_add_member_modal(add_clicks, confirm, cancel, is_open, project_id):
         ctx = dash.callback_context
         if not ctx.triggered:
-            return is_open
+            return is_open, dash.no_update
             
         button_id = ctx.triggered[0]['prop_id'].split('.')[0]
         
         if button_id == 'add-member-button' and add_clicks:
-            return True
+            return True, render_add_member_form(project_id) if project_id else dash.no_update
         elif button_id == 'confirm-add-member' and confirm:
-            return False
+            return False, dash.no_update
         elif button_id == 'cancel-add-member' and cancel:
-            return False
+            return False, dash.no_update
             
-        return is_open
+        return is_open, dash.no_update
     
-    # Populate add member form
+    # Refresh member candidates as the user types
     @app.callback(
-        [Output('add-member-content', 'children'),
-         Output('selected-project-id', 'data', allow_duplicate=True)],
-        [Input('add-member-modal', 'is_open')],
+        [Output('member-select', 'options'),
+         Output('member-select', 'value')],
+        [Input('member-search', 'value')],
         [State('selected-project-id', 'data')],
         prevent_initial_call=True
     )
-    @db_session
-    def populate_add_member_form(is_open, project_id):
-        if not is_open or not project_id:
-            return dash.no_update, project_id
-            
-        # Get all users who aren't already members of this project
-        from model import list_all_users
-        project = get_project(project_id)
-        if not project:
-            return html.P("Project not found"), project_id
-            
-        all_users = list_all_users()
-        available_users = [user for user in all_users 
-                          if user.id != current_user.id and user not in project.members]
+    def search_member_candidates(prefix, project_id):
+        if not project_id or not current_user.is_authenticated:
+            return dash.no_update, dash.no_update
         
-        if not available_users:
-            return html.P("No available users to add"), project_id
-            
-        return html.Div([
-            html.P(f"Add a member to project: {project.name}"),
-            dbc.Label("Select User"),
-            dbc.Select(
-                id="member-select",
-                options=[{"label": user.username, "value": user.id} for user in available_users],
-                value=available_users[0].id if available_users else None
-            )
-        ]), project_id
+        candidates = search_users((prefix or '').strip(), project_id, current_user.id)
+        options = [{"label": username, "value": user_id} for user_id, username in candidates]
+        return options, candidates[0][0] if candidates else None
     
-    # Add member to project
+    # Add member to project and update the member count of its row
     @app.callback(
-        Output('project-message', 'children', allow_duplicate=True),
+        [PROJECTS_CONTAINERS,
+         Output('project-message', 'children', allow_duplicate=True),
+         Output('loaded-project-tabs', 'data', allow_duplicate=True)],
         [Input('confirm-add-member', 'n_clicks')],
         [State('selected-project-id', 'data'),
-         State('member-select', 'value')],
+         State('member-select', 'value'),
+         State('projects-table', 'selected_rows', allow_optional=True),
+         State('projects-table', 'selected_row_ids', allow_optional=True)],
         prevent_initial_call=True
     )
-    @db_session
-    def add_member_to_project_callback(n_clicks, project_id, user_id):
+    @write_session
+    def add_member_to_project_callback(n_clicks, project_id, user_id, selected_rows, selected_row_ids):
         if not n_clicks or not project_id or not user_id:
-            return dash.no_update
+            return managed_container_update(dash.no_update), dash.no_update, dash.no_update
             
-        if add_member_to_project(project_id, user_id):
-            return dbc.Alert('Member added successfully', color='success')
-        else:
-            return dbc.Alert('Failed to add member', color='danger')
+        if not add_member_to_project(project_id, user_id):
+            return managed_container_update(dash.no_update), dbc.Alert('Failed to add member', color='danger'), dash.no_update
+        
+        row_index = selected_row_index(project_id, selected_rows, selected_row_ids)
+        if row_index is None:
+            # The row is not on screen, so just mark the cached tabs as stale
+            return managed_container_update(dash.no_update), dbc.Alert('Member added successfully', color='success'), []
+        
+        update = Patch()
+        update['props']['data'][row_index]['member_count'] = get_project_record(project_id).member_count
+        return managed_container_update(update), dbc.Alert('Member added successfully', color='success'), dash.no_update
     
     # Toggle close project modal from projects page
     @app.callback(
@@ -233,19 +370,24 @@ def register_project_callbacks(app):
             
         return is_open
     
-    # Close project
+    # Close project and update the status and end date of its row
     @app.callback(
-        [Output('project-message', 'children', allow_duplicate=True),
-         Output('close-project-error', 'children')],
+        [PROJECTS_CONTAINERS,
+         Output('project-message', 'children', allow_duplicate=True),
+         Output('close-project-error', 'children'),
+         Output('loaded-project-tabs', 'data', allow_duplicate=True)],
         [Input('confirm-close-project', 'n_clicks')],
         [State('selected-project-id', 'data'),
-         State('project-end-date', 'value')],
+         State('project-end-date', 'value'),
+         State('projects-table', 'selected_rows', allow_optional=True),
+         State('projects-table', 'selected_row_ids', allow_optional=True)],
         prevent_initial_call=True
     )
-    @db_session
-    def close_project_callback(n_clicks, project_id, end_date):
+    @write_session
+    def close_project_callback(n_clicks, project_id, end_date, selected_rows, selected_row_ids):
+        unchanged = managed_container_update(dash.no_update)
         if not n_clicks or not project_id or not end_date:
-            return dash.no_update, ""
+            return unchanged, dash.no_update, "", dash.no_update
             
         end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
         
@@ -253,13 +395,76 @@ def register_project_callbacks(app):
         from model import close_project
         project = get_project(project_id)
         if not project:
-            return dbc.Alert('Project not found', color='danger'), ""
+            return unchanged, dbc.Alert('Project not found', color='danger'), "", dash.no_update
             
         if project.manager.id != current_user.id:
-            return dbc.Alert('Only the project manager can close a project', color='danger'), ""
+            return unchanged, dbc.Alert('Only the project manager can close a project', color='danger'), "", dash.no_update
             
         # Try to close the project
-        if close_project(project_id, end_date_obj):
-            return dbc.Alert('Project closed successfully', color='success'), ""
-        else:
-            return dash.no_update, "End date must be after the start date"
\ No newline at end of file
+        if not close_project(project_id, end_date_obj):
+            return unchanged, dash.no_update, "End date must be after the start date", dash.no_update
+        
+        row_index = selected_row_index(project_id, selected_rows, selected_row_ids)
+        if row_index is None:
+            # The row is not on screen, so just mark the cached tabs as stale
+            return unchanged, dbc.Alert('Project closed successfully', color='success'), "", []
+        
+        update = Patch()
+        update['props']['data'][row_index]['end_date'] = end_date_obj.strftime('%Y-%m-%d')
+        update['props']['data'][row_index]['status'] = 'Completed'
+        return managed_container_update(update), dbc.Alert('Project closed successfully', color='success'), "", dash.no_update
+    
+    # Follow the change stream of the displayed page (runs in the browser, see assets/project_events.js)
+    app.clientside_callback(
+        ClientsideFunction(namespace='project_events', function_name='follow'),
+        Output('project-change-stream', 'data'),
+        Input('url', 'pathname')
+    )
+    
+    # Apply a pushed project change by fetching only the project it is about
+    @app.callback(
+        [PROJECTS_CONTAINERS,
+         Output('loaded-project-tabs', 'data', allow_duplicate=True),
+         Output('page-content', 'children', allow_duplicate=True),
+         Output('project-message', 'children', allow_duplicate=True)],
+        [Input('project-change', 'data')],
+        [State('url', 'pathname'),
+         State('loaded-project-tabs', 'data'),
+         State('projects-tabs', 'active_tab', allow_optional=True),
+         State('projects-table', 'derived_virtual_row_ids', allow_optional=True),
+         State('member-projects-table', 'derived_virtual_row_ids', allow_optional=True),
+         State('dot-editor', 'value', allow_optional=True),
+         State('dot-editor-saved', 'data', allow_optional=True)],
+        prevent_initial_call=True
+    )
+    @read_session
+    def apply_project_change(change, pathname, loaded_tabs, active_tab, managed_ids, member_ids,
+                             editor_value, saved_graph):
+        unchanged = container_updates({}), dash.no_update, dash.no_update, dash.no_update
+        if not change or not pathname or not current_user.is_authenticated:
+            return unchanged
+        project_id = change['project_id']
+        
+        if pathname == '/projects':
+            if project_id is None:
+                # Any project may have changed: reload the active tab, the other one when shown
+                tab = active_tab or 'managed'
+                return container_updates({tab: render_project_tab(tab)}), [tab], dash.no_update, dash.no_update
+            updates = project_change_updates(project_id, loaded_tabs, managed_ids, member_ids)
+            return container_updates(updates), dash.no_update, dash.no_update, dash.no_update
+        
+        if pathname.startswith('/project/'):
+            try:
+                shown_id = int(pathname.split('/')[-1])
+            except ValueError:
+                return unchanged
+            if project_id not in (None, shown_id):
+                return unchanged
+            if editor_value is not None and saved_graph is not None and editor_value != saved_graph:
+                # Rendering the page again would throw the unsaved graph away
+                message = dbc.Alert('This project was changed elsewhere. Save or revert the graph, '
+                                    'then refresh to see the changes.', color='info')
+                return container_updates({}), dash.no_update, dash.no_update, message
+            return container_updates({}), dash.no_update, get_project_detail_layout(shown_id), dash.no_update
+        
+        return unchanged
\ No newline at end of file
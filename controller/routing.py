@@ -3,23 +3,41 @@ import dash
 from dash.dependencies import Input, Output
 from flask_login import current_user, logout_user
 
-from model import get_project
+from model import get_project, get_users_version, get_project_list_version, read_session
 from view import (
     get_home_layout, get_dashboard_layout, get_login_layout, 
     get_register_layout, get_profile_layout, get_admin_layout, 
-    get_projects_layout, get_project_detail_layout
+    get_projects_layout, get_project_detail_layout, get_navbar,
+    get_search_layout, create_user_info_display
 )
+from .admin import render_users_table, render_audit_page
+from .projects import render_project_tab
 
 def register_routing_callbacks(app):
     """Register page routing callbacks"""
     
+    # One request per navigation: the navbar and the page are rendered
+    # together, with the data of the page already filled in
     @app.callback(
-        [Output('page-content', 'children'),
-         Output('url', 'pathname', allow_duplicate=True)],
+        [Output('navbar-container', 'children'),
+         Output('page-content', 'children'),
+         Output('url', 'pathname', allow_duplicate=True),
+         Output('loaded-project-tabs', 'data', allow_duplicate=True)],
         [Input('url', 'pathname')],
         prevent_initial_call=True
     )
+    # One session for the whole page, so the current user and the project
+    # are each loaded once and reused from Pony's identity map
+    @read_session
     def display_page(pathname):
+        page, redirect = render_page(pathname)
+        # The managed tab is rendered with the projects page
+        loaded_tabs = ['managed'] if pathname == '/projects' and redirect is dash.no_update else dash.no_update
+        # Rendered last, so it reflects a logout done by the page
+        return get_navbar(), page, redirect, loaded_tabs
+    
+    def render_page(pathname):
+        """Returns the layout for a pathname and the pathname to redirect to (or no_update)"""
         # Handle logout
         if pathname == '/logout':
             if current_user.is_authenticated:
@@ -45,19 +63,25 @@ def register_routing_callbacks(app):
         
         if pathname == '/profile':
             if current_user.is_authenticated:
-                return get_profile_layout(), dash.no_update
+                user_info = create_user_info_display(current_user.username, current_user.email, current_user.is_admin)
+                return get_profile_layout(user_info), dash.no_update
             return get_login_layout(), '/login'
             
         if pathname == '/admin':
             if current_user.is_authenticated:
                 if current_user.is_admin:
-                    return get_admin_layout(), dash.no_update
+                    return get_admin_layout(render_users_table(), render_audit_page(), get_users_version()), dash.no_update
                 return get_dashboard_layout(), '/dashboard'
             return get_login_layout(), '/login'
             
         if pathname == '/projects':
             if current_user.is_authenticated:
-                return get_projects_layout(), dash.no_update
+                return get_projects_layout(render_project_tab('managed'), get_project_list_version(current_user.id)), dash.no_update
+            return get_login_layout(), '/login'
+            
+        if pathname == '/search':
+            if current_user.is_authenticated:
+                return get_search_layout(), dash.no_update
             return get_login_layout(), '/login'
             
         # Handle project detail pages
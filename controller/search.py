@@ -0,0 +1,26 @@
+# controller/search.py
+import dash
+from dash.dependencies import Input, Output
+from flask_login import current_user
+
+from model import search_projects
+from view import create_search_results
+
+def register_search_callbacks(app):
+    """Register the project search callbacks"""
+    
+    # Callback to search the projects the user can see as they type
+    @app.callback(
+        Output('project-search-results', 'children'),
+        [Input('project-search-input', 'value')],
+        prevent_initial_call=True
+    )
+    def update_search_results(text):
+        if not current_user.is_authenticated:
+            return dash.no_update
+        if not text or not text.strip():
+            return None
+        
+        # Admins search every project, everyone else their own
+        scope = None if current_user.is_admin else current_user.id
+        return create_search_results(search_projects(text, scope), text.strip())
@@ -0,0 +1,30 @@
+# gunicorn.conf.py
+# Production server settings, overridable through environment variables
+import multiprocessing
+import os
+
+wsgi_app = 'wsgi:create_server()'
+bind = os.environ.get('BIND', '0.0.0.0:8050')
+
+# Worker processes and threads per worker. Threads that wait on a project
+# change stream are idle, so there are enough for a few open tabs each
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('WEB_THREADS', 16))
+
+# Worker type and open connections per worker. Every open project change
+# stream holds a thread, so many streams need more threads or gevent workers
+worker_class = os.environ.get('WEB_WORKER_CLASS', 'gthread')
+worker_connections = int(os.environ.get('WEB_CONNECTIONS', 1000))
+# Leave a quarter of the threads (at least one) for ordinary requests:
+# streams beyond this get a 503 and the page polls for changes instead
+# (set before the app is loaded)
+if worker_class == 'gthread':
+    os.environ.setdefault('EVENT_STREAMS', str(max(threads - max(threads // 4, 1), 0)))
+
+# Build the app once in the master and fork workers from it (wsgi.create_server
+# closes the master's database connection, and the audit log resets after fork)
+preload_app = os.environ.get('PRELOAD_APP', '1') == '1'
+
+timeout = int(os.environ.get('WEB_TIMEOUT', 30))
+accesslog = os.environ.get('ACCESS_LOG')
+
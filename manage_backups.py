@@ -0,0 +1,60 @@
+# manage_backups.py
+"""Back up and restore the application database while the app is running
+
+Usage:
+    python manage_backups.py backup [--keep N]
+    python manage_backups.py schedule --every HOURS [--keep N]
+    python manage_backups.py list
+    python manage_backups.py restore PATH
+"""
+import argparse
+import time
+
+from model.backup import (
+    BACKUP_RETENTION, backup_database, list_backups, prune_backups, restore_database
+)
+
+def run_backup(keep):
+    """Take one backup, drop the expired ones and print what happened"""
+    record = backup_database()
+    print(f"Backed up to {record['path']} ({record['size']} bytes) in {record['duration_ms']} ms")
+    for path in prune_backups(keep):
+        print(f'Removed old backup {path}')
+
+def main():
+    parser = argparse.ArgumentParser(description='Hot backup and restore of the SQLite database')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    backup = commands.add_parser('backup', help='take a backup now')
+    backup.add_argument('--keep', type=int, default=BACKUP_RETENTION,
+                        help=f'number of backups to keep (default: {BACKUP_RETENTION})')
+
+    schedule = commands.add_parser('schedule', help='take a backup every few hours')
+    schedule.add_argument('--every', type=float, required=True, help='hours between backups')
+    schedule.add_argument('--keep', type=int, default=BACKUP_RETENTION,
+                          help=f'number of backups to keep (default: {BACKUP_RETENTION})')
+
+    commands.add_parser('list', help='list the backups, newest first')
+
+    restore = commands.add_parser('restore', help='replace the database with a backup')
+    restore.add_argument('path', help='backup file to restore')
+
+    args = parser.parse_args()
+    if args.command == 'backup':
+        run_backup(args.keep)
+    elif args.command == 'schedule':
+        while True:
+            try:
+                run_backup(args.keep)
+            except Exception as e:
+                print(f'Backup failed: {e}')
+            time.sleep(args.every * 3600)
+    elif args.command == 'list':
+        for path in list_backups():
+            print(path)
+    else:
+        record = restore_database(args.path)
+        print(f"Restored {record['path']} in {record['duration_ms']} ms")
+
+if __name__ == '__main__':
+    main()
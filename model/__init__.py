@@ -1,18 +1,52 @@
 # model/__init__.py
 # Import and configure database
-from .database import db, configure_db
+from .database import db, configure_db, release_db_connection
 
 # Import entity classes
 from .user import User
-from .project import Project
+from .project import Project, DEFAULT_DOT_GRAPH
+from .blob import DotBlob
+from .revision import DotRevision
+from .audit import AuditEvent
+from .version import DataVersion
+
+# Read-only records for the list views
+from .records import UserRecord, ProjectRecord, SearchResult
+
+# Write-behind audit log
+from .audit_log import AUDIT_PAGE_SIZE, record_event, flush_audit_log, list_audit_events
+
+# Read path: read-only sessions in one deferred transaction
+from .read_path import read_session
+
+# Write path: retries on a locked database, optional writer thread, metrics
+from .write_path import write_session, get_write_metrics, reset_write_metrics
+
+# Project change notifications, read from the audit log
+from .changes import CHANGE_BUFFER_SIZE, subscribe_changes, unsubscribe_changes, change_subscriber_count
+
+# Full-text search over project names and graph labels
+from .search import SEARCH_LIMIT, search_projects
+
+# Startup warm-up of the page queries
+from .warmup import warm_up_queries
+
+# Streaming exports
+from .export import EXPORT_COLUMNS, export_projects, export_memberships, export_users
 
 # Import all operations for external use
 from .operations import (
+    MEMBER_SEARCH_LIMIT,
     initialize_db, get_user, get_user_by_username, add_user, validate_user,
-    list_all_users, promote_user_to_admin, delete_user, create_project,
+    existing_usernames, add_users, list_all_users, list_user_records, search_users, promote_user_to_admin, delete_user,
+    promote_users_to_admin, delete_users, create_project,
     get_project, close_project, add_member_to_project, remove_member_from_project,
-    get_user_managed_projects, get_user_member_projects, delete_project,
-    update_dot_graph
+    add_members_to_project, remove_members_from_project,
+    get_project_member_names, is_project_member, is_project_visible, get_visible_project_ids, get_user_managed_projects, get_user_member_projects, delete_project,
+    get_project_record, get_managed_project_records, get_member_project_records,
+    get_users_version, get_project_version, get_project_list_version,
+    update_dot_graph, store_dot_blob, get_dot_graph, list_dot_revisions,
+    get_dot_revision, diff_dot_revisions
 )
 
 # Configure the database when the module is imported
@@ -23,10 +57,20 @@ initialize_db()
 
 # Export all necessary functions to maintain compatibility with existing imports
 __all__ = [
-    'db', 'User', 'Project',
+    'db', 'release_db_connection', 'User', 'Project', 'MEMBER_SEARCH_LIMIT', 'DotBlob', 'DotRevision', 'DEFAULT_DOT_GRAPH',
     'initialize_db', 'get_user', 'get_user_by_username', 'add_user', 'validate_user',
-    'list_all_users', 'promote_user_to_admin', 'delete_user', 'create_project',
+    'existing_usernames', 'add_users', 'list_all_users', 'list_user_records', 'search_users', 'promote_user_to_admin', 'delete_user',
+    'promote_users_to_admin', 'delete_users', 'create_project',
     'get_project', 'close_project', 'add_member_to_project', 'remove_member_from_project',
-    'get_user_managed_projects', 'get_user_member_projects', 'delete_project',
-    'update_dot_graph'
+    'add_members_to_project', 'remove_members_from_project',
+    'get_project_member_names', 'is_project_member', 'is_project_visible', 'get_visible_project_ids', 'get_user_managed_projects', 'get_user_member_projects', 'delete_project',
+    'UserRecord', 'ProjectRecord', 'SearchResult', 'get_project_record', 'get_managed_project_records', 'get_member_project_records',
+    'DataVersion', 'get_users_version', 'get_project_version', 'get_project_list_version',
+    'update_dot_graph', 'store_dot_blob', 'get_dot_graph', 'list_dot_revisions',
+    'get_dot_revision', 'diff_dot_revisions',
+    'EXPORT_COLUMNS', 'export_projects', 'export_memberships', 'export_users',
+    'AuditEvent', 'AUDIT_PAGE_SIZE', 'record_event', 'flush_audit_log', 'list_audit_events',
+    'SEARCH_LIMIT', 'search_projects',
+    'CHANGE_BUFFER_SIZE', 'subscribe_changes', 'unsubscribe_changes', 'change_subscriber_count',
+    'warm_up_queries', 'read_session', 'write_session', 'get_write_metrics', 'reset_write_metrics'
 ]
\ No newline at end of file
@@ -0,0 +1,17 @@
+# model/audit.py
+from pony.orm import Required, Optional
+from datetime import datetime
+
+from .database import db
+
+# Define the AuditEvent entity: one append-only record of a mutation.
+# The actor is stored by id and name rather than as a relation, so events
+# outlive the users they mention
+class AuditEvent(db.Entity):
+    created_at = Required(datetime, default=datetime.now)
+    actor_id = Optional(int)
+    actor = Optional(str)
+    action = Required(str)
+    target_type = Required(str)
+    target_id = Optional(int)
+    details = Optional(str)
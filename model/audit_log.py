@@ -0,0 +1,165 @@
+# model/audit_log.py
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from pony.orm import desc
+
+from .database import db
+from .audit import AuditEvent
+from .read_path import read_session
+
+# Events waiting to be written; record_event blocks when the buffer is full
+AUDIT_QUEUE_SIZE = 10000
+# Most events written per transaction, and how long the writer gathers a batch
+AUDIT_BATCH_SIZE = 500
+AUDIT_FLUSH_INTERVAL = 0.5
+# Events per page of the admin view
+AUDIT_PAGE_SIZE = 25
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+_queue = queue.Queue(maxsize=AUDIT_QUEUE_SIZE)
+_writer = None
+_writer_lock = threading.Lock()
+# Per-thread actor override and events held back until a write commits
+_local = threading.local()
+
+def current_actor():
+    """Return the id and username of the acting user (from the request, if any)"""
+    from flask import has_request_context
+    from flask_login import current_user
+    
+    if getattr(_local, 'actor', None) is not None:
+        return _local.actor
+    if has_request_context() and current_user.is_authenticated:
+        return current_user.id, current_user.username
+    return None, ''
+
+def set_actor(actor):
+    """Attribute this thread's events to actor (for writes run on another thread)"""
+    _local.actor = actor
+
+def defer_events():
+    """Hold back this thread's events until release_deferred_events"""
+    _local.deferred = []
+
+def release_deferred_events():
+    """Queue the events held back since defer_events (the write committed)"""
+    events, _local.deferred = getattr(_local, 'deferred', None) or [], None
+    for event in events:
+        _enqueue(event)
+
+def discard_deferred_events():
+    """Drop the events held back since defer_events (the write rolled back)"""
+    _local.deferred = None
+
+def _enqueue(event):
+    _ensure_writer()
+    _queue.put(event)
+
+def record_event(action, target_type, target_id=None, **details):
+    """Queue an audit event; it is written to the database by the background writer"""
+    actor_id, actor = current_actor()
+    event = {
+        'created_at': datetime.now().isoformat(sep=' '),
+        'actor_id': actor_id,
+        'actor': actor,
+        'action': action,
+        'target_type': target_type,
+        'target_id': target_id,
+        'details': json.dumps(details, default=str) if details else ''
+    }
+    if getattr(_local, 'deferred', None) is not None:
+        _local.deferred.append(event)
+    else:
+        _enqueue(event)
+
+def _write_events(events):
+    """Insert a batch of events in one statement"""
+    rows = json.dumps(events)
+    db.execute("""
+        INSERT INTO "AuditEvent" ("created_at", "actor_id", "actor", "action", "target_type", "target_id", "details")
+        SELECT json_extract("value", '$$.created_at'), json_extract("value", '$$.actor_id'),
+               json_extract("value", '$$.actor'), json_extract("value", '$$.action'),
+               json_extract("value", '$$.target_type'), json_extract("value", '$$.target_id'),
+               json_extract("value", '$$.details')
+        FROM json_each($rows)
+    """)
+
+def _run_writer():
+    """Write queued events in batches until the stop marker is seen"""
+    # Batches go through the write path, so a locked database is retried, but
+    # always on this thread (see run_write)
+    from .write_path import run_write
+    
+    while True:
+        batch = [_queue.get()]
+        deadline = time.monotonic() + AUDIT_FLUSH_INTERVAL
+        while batch[-1] is not _STOP and len(batch) < AUDIT_BATCH_SIZE:
+            try:
+                batch.append(_queue.get(timeout=max(0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        
+        events = [event for event in batch if event is not _STOP]
+        try:
+            if events:
+                run_write(_write_events, events)
+        except Exception:
+            logger.exception('Could not write %d audit events', len(events))
+        finally:
+            for _ in batch:
+                _queue.task_done()
+        if batch[-1] is _STOP:
+            return
+
+def _ensure_writer():
+    """Start the writer thread of this process if it is not running"""
+    global _writer
+    if _writer is not None and _writer.is_alive():
+        return
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_run_writer, name='audit-writer', daemon=True)
+            _writer.start()
+
+def flush_audit_log():
+    """Block until every queued event has been written"""
+    _queue.join()
+
+def _shutdown():
+    """Write the remaining events and stop the writer (runs at interpreter exit)"""
+    if _writer is not None and _writer.is_alive():
+        _queue.put(_STOP)
+        _writer.join()
+
+def _reset_after_fork():
+    """A forked child starts with an empty buffer and no writer thread"""
+    global _queue, _writer, _writer_lock
+    _queue = queue.Queue(maxsize=AUDIT_QUEUE_SIZE)
+    _writer = None
+    _writer_lock = threading.Lock()
+
+atexit.register(_shutdown)
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+@read_session
+def list_audit_events(before_id=None, after_id=None, limit=AUDIT_PAGE_SIZE):
+    """Return a page of audit events, newest first, using keyset pagination
+
+    before_id gives the page of older events, after_id the page of newer
+    ones; with neither the latest page is returned.
+    """
+    if after_id is not None:
+        events = AuditEvent.select(lambda e: e.id > after_id).order_by(AuditEvent.id).limit(limit)[:]
+        return list(reversed(events))
+    query = AuditEvent.select()
+    if before_id is not None:
+        query = query.filter(lambda e: e.id < before_id)
+    return query.order_by(desc(AuditEvent.id)).limit(limit)[:]
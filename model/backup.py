@@ -0,0 +1,119 @@
+# model/backup.py
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+from .database import DATA_DIR, DB_PATH
+
+# Where backups and their log are kept
+BACKUP_DIR = os.path.join(DATA_DIR, 'backups')
+BACKUP_LOG = 'backups.jsonl'
+BACKUP_PREFIX = 'app_database-'
+
+# Number of backups kept by prune_backups
+BACKUP_RETENTION = 7
+
+def check_integrity(path):
+    """Return True if SQLite's integrity check passes for the database at path"""
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        return conn.execute('PRAGMA integrity_check').fetchone()[0] == 'ok'
+    except sqlite3.DatabaseError:
+        return False
+    finally:
+        conn.close()
+
+def _copy_database(source_path, target_path, journal_mode):
+    """Copy a database with the online backup API in a single step
+
+    In WAL mode the step only holds a read snapshot of the source, so
+    writers carry on meanwhile. Copying a few pages per step would not
+    help: every write to the source restarts an unfinished backup, so
+    under steady writes it would never finish. The copy is left in the
+    given journal mode.
+    """
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target, pages=-1)
+        target.execute(f'PRAGMA journal_mode={journal_mode}')
+    finally:
+        target.close()
+        source.close()
+
+def _log_backup(backup_dir, record):
+    """Append a backup record to the log kept next to the backups"""
+    with open(os.path.join(backup_dir, BACKUP_LOG), 'a') as f:
+        f.write(json.dumps(record) + '\n')
+
+def backup_database(backup_dir=BACKUP_DIR):
+    """Take a hot backup of the live database and verify it
+
+    Returns a dict with the backup path, its size and the duration of the
+    copy. The record is also appended to the backup log. A backup that fails the integrity check is removed and
+    a RuntimeError is raised.
+    """
+    os.makedirs(backup_dir, exist_ok=True)
+    name = f"{BACKUP_PREFIX}{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.sqlite"
+    path = os.path.join(backup_dir, name)
+    partial = path + '.part'
+
+    start = time.perf_counter()
+    # Backups are single files, without the live database's WAL
+    _copy_database(DB_PATH, partial, 'DELETE')
+    duration = time.perf_counter() - start
+
+    if not check_integrity(partial):
+        os.remove(partial)
+        raise RuntimeError(f'Backup {name} failed the integrity check')
+    os.replace(partial, path)
+
+    record = {
+        'path': path,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'size': os.path.getsize(path),
+        'duration_ms': round(duration * 1000, 1)
+    }
+    _log_backup(backup_dir, record)
+    return record
+
+def list_backups(backup_dir=BACKUP_DIR):
+    """Return the backup files, newest first"""
+    if not os.path.isdir(backup_dir):
+        return []
+    names = [
+        name for name in os.listdir(backup_dir)
+        if name.startswith(BACKUP_PREFIX) and name.endswith('.sqlite')
+    ]
+    return [os.path.join(backup_dir, name) for name in sorted(names, reverse=True)]
+
+def prune_backups(keep=BACKUP_RETENTION, backup_dir=BACKUP_DIR):
+    """Delete all but the newest keep backups; returns the deleted paths"""
+    expired = list_backups(backup_dir)[keep:]
+    for path in expired:
+        os.remove(path)
+    return expired
+
+def restore_database(backup_path):
+    """Replace the live database with a verified backup
+
+    The copy goes through the backup API in one step, so connections that
+    are already open see the restored data instead of a half-written file.
+    Older backups are migrated to the current schema afterwards, and the
+    search index is rebuilt if the backup predates it.
+    """
+    from .migrations import migrate_db
+    from .search import create_search_index
+
+    if not check_integrity(backup_path):
+        raise RuntimeError(f'{backup_path} failed the integrity check; not restoring it')
+    start = time.perf_counter()
+    _copy_database(backup_path, DB_PATH, 'WAL')
+    migrate_db(DB_PATH)
+    create_search_index(DB_PATH)
+    return {
+        'path': backup_path,
+        'duration_ms': round((time.perf_counter() - start) * 1000, 1)
+    }
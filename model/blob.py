@@ -0,0 +1,15 @@
+# model/blob.py
+from pony.orm import PrimaryKey, Required, Set, LongStr
+import hashlib
+
+from .database import db
+
+def content_hash(content):
+    """Returns the content address (SHA-256 hex digest) of a DOT source"""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+# Define the DotBlob entity: DOT sources stored once per distinct content
+class DotBlob(db.Entity):
+    hash = PrimaryKey(str)
+    content = Required(LongStr)
+    projects = Set("Project", reverse="dot_blob")
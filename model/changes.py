@@ -0,0 +1,217 @@
+# model/changes.py
+import collections
+import logging
+import os
+import threading
+import time
+
+from .database import db
+from .read_path import read_session
+
+# Changes buffered per subscriber; one that falls further behind gets a
+# single reload instead of the changes it missed
+CHANGE_BUFFER_SIZE = 256
+# How often the audit log is read for new changes while anyone is subscribed
+CHANGE_POLL_INTERVAL = 1.0
+# Most audit events read per query
+CHANGE_POLL_BATCH = 1000
+
+# Audit actions that change projects without naming one (memberships and
+# managed projects go with a deleted user)
+_ANY_PROJECT_ACTIONS = ('user.delete',)
+
+logger = logging.getLogger(__name__)
+
+def _to_change(event_id, action, target_type, target_id):
+    """Return the project change of an audit event, or None if it changes no project
+
+    A change is a dict with the event id, the project id and the action;
+    a project id of None means any project may have changed.
+    """
+    if target_type == 'project':
+        return {'id': event_id, 'project_id': target_id, 'action': action}
+    if action in _ANY_PROJECT_ACTIONS:
+        return {'id': event_id, 'project_id': None, 'action': action}
+    return None
+
+@read_session
+def latest_change_id():
+    """Return the id of the newest audit event (0 for an empty log)"""
+    return db.select('SELECT coalesce(max("id"), 0) FROM "AuditEvent"')[0]
+
+@read_session
+def changes_since(last_id, limit=CHANGE_POLL_BATCH):
+    """Return the project changes after audit event last_id, oldest first, and the last event id read
+
+    The audit log is written once a write has committed, and by every
+    process, so it is the shared, ordered record of what changed.
+    """
+    rows = db.select("""SELECT "id", "action", "target_type", "target_id" FROM "AuditEvent"
+        WHERE "id" > $last_id ORDER BY "id" LIMIT $limit""")
+    changes = [change for change in (_to_change(*row) for row in rows) if change]
+    return changes, rows[-1][0] if rows else last_id
+
+class Subscription:
+    """One subscriber's bounded buffer of changes, filled by the hub"""
+
+    def __init__(self, project_id=None):
+        self.project_id = project_id
+        self.last_id = 0
+        self._changes = []
+        self._newest_id = 0
+        self._overflowed = False
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+
+    def offer(self, change):
+        with self._lock:
+            self._newest_id = max(self._newest_id, change['id'])
+            if len(self._changes) >= CHANGE_BUFFER_SIZE:
+                self._changes.clear()
+                self._overflowed = True
+            if not self._overflowed:
+                self._changes.append(change)
+        self._ready.set()
+
+    def overflow(self, newest_id):
+        """Replace whatever is buffered by a reload up to audit event newest_id"""
+        with self._lock:
+            self._newest_id = max(self._newest_id, newest_id)
+            self._changes.clear()
+            self._overflowed = True
+        self._ready.set()
+
+    def wait(self, timeout):
+        """Return the changes buffered so far, waiting up to timeout seconds for one
+
+        A subscriber that overflowed gets one reload change (project id
+        None) instead of the changes that were dropped.
+        """
+        self._ready.wait(timeout)
+        with self._lock:
+            self._ready.clear()
+            changes, self._changes = self._changes, []
+            overflowed, self._overflowed = self._overflowed, False
+            newest_id = self._newest_id
+        if overflowed:
+            self.last_id = max(self.last_id, newest_id)
+            return [{'id': self.last_id, 'project_id': None, 'action': 'reload'}]
+        # Changes replayed at subscription can also arrive from the hub, in any order
+        fresh = []
+        for change in sorted(changes, key=lambda change: change['id']):
+            if change['id'] > self.last_id:
+                fresh.append(change)
+                self.last_id = change['id']
+        return fresh
+
+class ChangeHub:
+    """In-process fan-out of project changes to subscribers
+
+    Subscriptions are indexed by project (None: every project), so a
+    change only touches the subscribers it is for. A feeder thread reads
+    new changes from the audit log while anyone is subscribed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = collections.defaultdict(set)
+        self._count = 0
+        self._last_id = None
+        self._feeder = None
+
+    def subscribe(self, project_id=None, after_id=None):
+        """Return a new Subscription to one project's changes or to all of them
+
+        With after_id, the changes after that audit event are replayed
+        first (or a reload if there are more than a buffer holds).
+        """
+        subscription = Subscription(project_id)
+        with self._lock:
+            # Start from the current end of the log, before any replay
+            # reads it, so no change falls between the two
+            if self._last_id is None:
+                self._last_id = latest_change_id()
+            start_id = subscription.last_id = self._last_id
+            self._subscriptions[project_id].add(subscription)
+            self._count += 1
+            if self._feeder is None or not self._feeder.is_alive():
+                self._feeder = threading.Thread(target=self._run_feeder, name='change-feeder', daemon=True)
+                self._feeder.start()
+        if after_id is not None and after_id < start_id:
+            subscription.last_id = after_id
+            changes, read_id = changes_since(after_id)
+            for change in changes:
+                if project_id is None or change['project_id'] in (None, project_id):
+                    subscription.offer(change)
+            if read_id < start_id:
+                # Too far behind to replay everything it missed
+                subscription.overflow(start_id)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscriptions.get(subscription.project_id)
+            if subscribers and subscription in subscribers:
+                subscribers.discard(subscription)
+                self._count -= 1
+                if not subscribers:
+                    del self._subscriptions[subscription.project_id]
+
+    def subscriber_count(self):
+        return self._count
+
+    def publish(self, changes):
+        """Hand changes to the subscribers of their project and to those of every project"""
+        for change in changes:
+            with self._lock:
+                if change['project_id'] is None:
+                    targets = [s for subscribers in self._subscriptions.values() for s in subscribers]
+                else:
+                    targets = list(self._subscriptions.get(change['project_id'], ()))
+                    targets.extend(self._subscriptions.get(None, ()))
+            for subscription in targets:
+                subscription.offer(change)
+
+    def _run_feeder(self):
+        """Publish new audit log changes until nobody is subscribed"""
+        while True:
+            time.sleep(CHANGE_POLL_INTERVAL)
+            with self._lock:
+                if not self._count:
+                    # The next subscriber starts from the end of the log again
+                    self._last_id = None
+                    self._feeder = None
+                    return
+                last_id = self._last_id
+            try:
+                # Read until the end of the log, a batch at a time
+                while True:
+                    changes, read_id = changes_since(last_id)
+                    if read_id == last_id:
+                        break
+                    self.publish(changes)
+                    with self._lock:
+                        self._last_id = last_id = read_id
+            except Exception:
+                logger.exception('Could not read project changes')
+
+_hub = ChangeHub()
+
+def subscribe_changes(project_id=None, after_id=None):
+    """Subscribe to the changes of one project (or all) in this process' hub"""
+    return _hub.subscribe(project_id, after_id)
+
+def unsubscribe_changes(subscription):
+    """End a subscription made with subscribe_changes"""
+    _hub.unsubscribe(subscription)
+
+def change_subscriber_count():
+    """Return the number of subscriptions in this process' hub"""
+    return _hub.subscriber_count()
+
+def _reset_after_fork():
+    """A forked child starts with an empty hub and no feeder thread"""
+    global _hub
+    _hub = ChangeHub()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -1,18 +1,46 @@
 # model/database.py
 from pony.orm import Database
 import os
+import sqlite3
 
 # Initialize the database
 db = Database()
 
-# Configure the database path - now in the data directory
+# Location of the database - now in the data directory
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
+DB_PATH = os.path.join(DATA_DIR, 'app_database.sqlite')
+
+# Seconds SQLite itself waits for the write lock before reporting it as locked
+# (the write path then retries, see write_path.py)
+DB_BUSY_TIMEOUT = 2.0
+
+# Configure the database path
 def configure_db():
-    data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
-    
     # Create data directory if it doesn't exist
-    if not os.path.exists(data_dir):
-        os.makedirs(data_dir)
-        
-    db_path = os.path.join(data_dir, 'app_database.sqlite')
-    db.bind(provider='sqlite', filename=db_path, create_db=True)
-    db.generate_mapping(create_tables=True)
\ No newline at end of file
+    if not os.path.exists(DATA_DIR):
+        os.makedirs(DATA_DIR)
+    
+    # Bring an existing database up to date before Pony checks the tables
+    if os.path.exists(DB_PATH):
+        from .migrations import migrate_db
+        migrate_db(DB_PATH)
+    
+    db.bind(provider='sqlite', filename=DB_PATH, create_db=True, timeout=DB_BUSY_TIMEOUT)
+    db.generate_mapping(create_tables=True)
+    
+    # The full-text index is a virtual table that Pony does not manage
+    from .search import create_search_index
+    create_search_index(DB_PATH)
+    
+    # Let readers in other worker processes proceed while one of them writes
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.close()
+
+def release_db_connection():
+    """Close this thread's database connection; Pony opens a new one when needed
+
+    Called before forking workers, so that no SQLite connection is shared
+    between processes.
+    """
+    db.disconnect()
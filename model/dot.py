@@ -0,0 +1,218 @@
+# model/dot.py
+import json
+import re
+import zlib
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+# Every SNAPSHOT_INTERVAL-th revision stores the full source, so rebuilding
+# any revision applies at most SNAPSHOT_INTERVAL - 1 deltas
+SNAPSHOT_INTERVAL = 20
+
+# Revision payload encoding
+def encode_snapshot(source):
+    """Compress a full DOT source"""
+    return zlib.compress(source.encode('utf-8'))
+
+def encode_delta(base, target):
+    """Compress a line delta that rebuilds target from base
+
+    The delta is a list of operations: [start, end] copies base lines
+    start..end, a string inserts new text.
+    """
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+    ops = []
+    matcher = SequenceMatcher(None, base_lines, target_lines)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append(''.join(target_lines[j1:j2]))
+    return zlib.compress(json.dumps(ops, separators=(',', ':')).encode('utf-8'))
+
+def decode_snapshot(payload):
+    """Decompress a full DOT source"""
+    return zlib.decompress(payload).decode('utf-8')
+
+def apply_delta(base, payload):
+    """Rebuild a source from its base and a compressed delta"""
+    base_lines = base.splitlines(keepends=True)
+    parts = []
+    for op in json.loads(zlib.decompress(payload)):
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.extend(base_lines[op[0]:op[1]])
+    return ''.join(parts)
+
+# Structural parsing of DOT sources
+_TOKEN = re.compile(r"""
+    (?P<comment>//[^\n]*|\#[^\n]*|/\*.*?\*/)
+  | (?P<string>"(?:\\.|[^"\\])*")
+  | (?P<html><(?:[^<>]|<[^<>]*>)*>)
+  | (?P<edgeop>->|--)
+  | (?P<id>[A-Za-z_\u0080-\uffff][\w\u0080-\uffff]*|-?(?:\.\d+|\d+(?:\.\d*)?))
+  | (?P<punct>[{}\[\];,=:])
+  | (?P<space>\s+)
+""", re.VERBOSE | re.DOTALL)
+
+# Fast path for the common one-line forms: a; a [x=1]; a -> b -> c [x=1];
+_SIMPLE_ID = r'(?:"(?:\\.|[^"\\\n])*"|[A-Za-z_0-9.\u0080-\uffff]+)'
+_SIMPLE_STATEMENT = re.compile(
+    r'\s*(%s(?:\s*(?:->|--)\s*%s)*)\s*(?:\[([^\[\]"]*(?:"(?:\\.|[^"\\\n])*"[^\[\]"]*)*)\])?\s*;?\s*$'
+    % (_SIMPLE_ID, _SIMPLE_ID)
+)
+_SIMPLE_EDGE_OP = re.compile(r'\s*(?:->|--)\s*')
+_BLOCK_COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+_SIMPLE_ATTR = re.compile(r'(%s)\s*=\s*(%s)' % (_SIMPLE_ID, _SIMPLE_ID))
+
+_KEYWORDS = {'graph', 'digraph', 'subgraph', 'node', 'edge', 'strict'}
+
+def _unquote(value):
+    if value.startswith('"'):
+        return value[1:-1].replace('\\"', '"')
+    return value
+
+class _DotParser:
+    """Incremental node/edge collector for DOT sources"""
+    
+    def __init__(self):
+        self.nodes = {}
+        self.edges = {}
+        self.statement = []
+        self.attrs = []
+        self.in_attrs = False
+        self.pending_key = None
+    
+    @property
+    def idle(self):
+        return not self.statement and not self.in_attrs
+    
+    def add(self, names, attr_list):
+        if len(names) > 1:
+            nodes = self.nodes
+            for tail, head in zip(names, names[1:]):
+                if tail not in nodes:
+                    nodes[tail] = ()
+                if head not in nodes:
+                    nodes[head] = ()
+                self.edges[(tail, head)] = attr_list
+        elif names:
+            self.nodes[names[0]] = attr_list
+    
+    def flush(self):
+        kinds = [kind for kind, value in self.statement]
+        if kinds and kinds[0] != 'keyword':
+            names = [value for kind, value in self.statement if kind != 'edgeop']
+            if len(names) == 1 or 'edgeop' in kinds:
+                self.add(names, tuple(sorted(self.attrs)))
+        self.statement = []
+        self.attrs = []
+    
+    def feed(self, text):
+        for match in _TOKEN.finditer(text):
+            kind = match.lastgroup
+            if kind in ('comment', 'space'):
+                continue
+            value = match.group()
+            if kind == 'string':
+                value = _unquote(value)
+            
+            if self.in_attrs:
+                if value == ']' and kind == 'punct':
+                    self.in_attrs = False
+                elif kind == 'punct':
+                    if value != '=':
+                        self.pending_key = None
+                elif self.pending_key is None:
+                    self.pending_key = value
+                else:
+                    self.attrs.append((self.pending_key, value))
+                    self.pending_key = None
+                continue
+            
+            if kind == 'id' and value.lower() in _KEYWORDS:
+                self.flush()
+                self.statement.append(('keyword', value.lower()))
+            elif kind == 'punct':
+                if value == '[':
+                    self.in_attrs = True
+                    self.pending_key = None
+                elif value in ';{}':
+                    self.flush()
+                elif value == '=':
+                    # graph attribute assignment such as rankdir=LR
+                    self.statement = [('keyword', 'graph')]
+                elif value == ':':
+                    # port suffix: the next name is not a node
+                    self.statement.append(('port', value))
+            elif self.statement and self.statement[-1][0] == 'port':
+                self.statement.pop()
+            elif kind == 'edgeop':
+                self.statement.append((kind, value))
+            else:
+                last = self.statement[-1] if self.statement else None
+                if last and last[0] == 'keyword' and last[1] in ('graph', 'digraph', 'subgraph'):
+                    # graph or subgraph name (or the value of a graph attribute)
+                    self.statement.append(('name', value))
+                    continue
+                if last and last[0] != 'edgeop':
+                    # two names in a row start a new statement
+                    self.flush()
+                self.statement.append((kind, value))
+
+def _simple_attrs(text):
+    pairs = _SIMPLE_ATTR.findall(text)
+    if '"' in text:
+        pairs = [(_unquote(key), _unquote(value)) for key, value in pairs]
+    return tuple(pairs) if len(pairs) < 2 else tuple(sorted(pairs))
+
+@lru_cache(maxsize=16)
+def parse_dot(source):
+    """Return (nodes, edges) of a DOT source
+
+    nodes maps node name to its attribute list, edges maps (tail, head) to
+    the attribute list of that edge. Attribute lists are sorted tuples of
+    (name, value) pairs. Graph, node and edge default statements and subgraph
+    names are skipped. Simple one-line statements are matched directly and
+    everything else goes through the tokenizer, so parsing stays linear.
+    Results are cached per source and must not be modified.
+    """
+    parser = _DotParser()
+    simple_match = _SIMPLE_STATEMENT.match
+    split_edges = _SIMPLE_EDGE_OP.split
+    add = parser.add
+    # Block comments may span lines, so drop them before the line pass
+    if '/*' in source:
+        source = _BLOCK_COMMENT.sub(' ', source)
+    for line in source.splitlines():
+        match = simple_match(line) if parser.idle else None
+        if match is None:
+            parser.feed(line + '\n')
+            continue
+        name_text = match.group(1)
+        names = split_edges(name_text)
+        if '"' in name_text:
+            names = [_unquote(name) for name in names]
+        if names[0].lower() in _KEYWORDS:
+            continue
+        attr_text = match.group(2)
+        add(names, _simple_attrs(attr_text) if attr_text else ())
+    parser.flush()
+    return parser.nodes, parser.edges
+
+def diff_dot(old_source, new_source):
+    """Return the node and edge level differences between two DOT sources"""
+    old_nodes, old_edges = parse_dot(old_source or '')
+    new_nodes, new_edges = parse_dot(new_source or '')
+    return {
+        'nodes_added': sorted(new_nodes.keys() - old_nodes.keys()),
+        'nodes_removed': sorted(old_nodes.keys() - new_nodes.keys()),
+        'nodes_changed': sorted(name for name in old_nodes.keys() & new_nodes.keys()
+                                if old_nodes[name] != new_nodes[name]),
+        'edges_added': sorted(new_edges.keys() - old_edges.keys()),
+        'edges_removed': sorted(old_edges.keys() - new_edges.keys()),
+        'edges_changed': sorted(edge for edge in old_edges.keys() & new_edges.keys()
+                                if old_edges[edge] != new_edges[edge]),
+    }
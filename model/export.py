@@ -0,0 +1,72 @@
+# model/export.py
+from .database import db
+from .read_path import read_session
+
+# Number of rows fetched per query while streaming an export
+EXPORT_CHUNK_SIZE = 1000
+
+# Columns of each export, in output order
+EXPORT_COLUMNS = {
+    'projects': ('id', 'name', 'start_date', 'end_date', 'manager', 'members'),
+    'memberships': ('project_id', 'project_name', 'user_id', 'username'),
+    'users': ('id', 'username', 'email', 'is_admin', 'is_active'),
+}
+
+# Projects visible to a user: the ones they manage or are a member of
+_VISIBLE_PROJECT = """
+    ($user_id IS NULL OR p."manager" = $user_id OR EXISTS (
+        SELECT 1 FROM "Project_User" v WHERE v."project" = p."id" AND v."user" = $user_id
+    ))
+"""
+
+def _iter_chunks(sql, params, next_key, chunk_size):
+    """Run a keyset-paginated query and yield its rows one chunk at a time
+
+    Each chunk is read in its own short read session, so a slow client never
+    holds a read transaction open, and only one chunk is in memory at once.
+    """
+    params = dict(params, chunk_size=chunk_size)
+    select_chunk = read_session(db.select)
+    while True:
+        rows = select_chunk(sql, params)
+        if not rows:
+            return
+        yield rows
+        if len(rows) < chunk_size:
+            return
+        params.update(next_key(rows[-1]))
+
+def export_projects(user_id=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield chunks of project rows with manager and ';'-separated member usernames
+
+    With user_id only that user's managed and member projects are exported.
+    """
+    sql = f"""SELECT p."id", p."name", p."start_date", p."end_date", m."username",
+               (SELECT group_concat(u."username", ';') FROM "Project_User" pu
+                JOIN "User" u ON u."id" = pu."user" WHERE pu."project" = p."id")
+        FROM "Project" p JOIN "User" m ON m."id" = p."manager"
+        WHERE p."id" > $last_id AND {_VISIBLE_PROJECT}
+        ORDER BY p."id" LIMIT $chunk_size
+    """
+    return _iter_chunks(sql, {'user_id': user_id, 'last_id': 0},
+                        lambda row: {'last_id': row[0]}, chunk_size)
+
+def export_memberships(user_id=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield chunks of (project, member) rows, restricted like export_projects"""
+    sql = f"""SELECT p."id", p."name", u."id", u."username"
+        FROM "Project_User" pu
+        JOIN "Project" p ON p."id" = pu."project"
+        JOIN "User" u ON u."id" = pu."user"
+        WHERE (pu."project", pu."user") > ($last_project, $last_user) AND {_VISIBLE_PROJECT}
+        ORDER BY pu."project", pu."user" LIMIT $chunk_size
+    """
+    return _iter_chunks(sql, {'user_id': user_id, 'last_project': 0, 'last_user': 0},
+                        lambda row: {'last_project': row[0], 'last_user': row[2]}, chunk_size)
+
+def export_users(chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield chunks of user rows (without password hashes)"""
+    sql = """SELECT "id", "username", "email", "is_admin", "is_active"
+        FROM "User" WHERE "id" > $last_id
+        ORDER BY "id" LIMIT $chunk_size
+    """
+    return _iter_chunks(sql, {'last_id': 0}, lambda row: {'last_id': row[0]}, chunk_size)
@@ -0,0 +1,41 @@
+# model/migrations.py
+import sqlite3
+
+from .blob import content_hash
+
+def migrate_dot_graphs_to_blobs(conn):
+    """Move inline Project.dot_graph sources into the content-addressed DotBlob table"""
+    columns = [row[1] for row in conn.execute('PRAGMA table_info("Project")')]
+    if 'dot_graph' not in columns or 'dot_blob' in columns:
+        return False
+    
+    conn.create_function('content_hash', 1, content_hash, deterministic=True)
+    with conn:
+        conn.execute('''CREATE TABLE IF NOT EXISTS "DotBlob" (
+  "hash" TEXT NOT NULL PRIMARY KEY,
+  "content" TEXT NOT NULL
+)''')
+        # One blob per distinct graph; identical sources (e.g. the default graph) share a row
+        conn.execute('''INSERT OR IGNORE INTO "DotBlob" ("hash", "content")
+            SELECT DISTINCT content_hash("dot_graph"), "dot_graph" FROM "Project"
+            WHERE "dot_graph" IS NOT NULL AND "dot_graph" != ''
+        ''')
+        conn.execute('ALTER TABLE "Project" ADD COLUMN "dot_blob" TEXT REFERENCES "DotBlob" ("hash") ON DELETE SET NULL')
+        conn.execute('''UPDATE "Project" SET "dot_blob" = content_hash("dot_graph")
+            WHERE "dot_graph" IS NOT NULL AND "dot_graph" != ''
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS "idx_project__dot_blob" ON "Project" ("dot_blob")')
+        conn.execute('ALTER TABLE "Project" DROP COLUMN "dot_graph"')
+    return True
+
+# Migrations are applied in order before Pony checks the mapping
+MIGRATIONS = [migrate_dot_graphs_to_blobs]
+
+def migrate_db(db_path):
+    """Apply pending schema migrations to an existing database file"""
+    conn = sqlite3.connect(db_path)
+    try:
+        for migration in MIGRATIONS:
+            migration(conn)
+    finally:
+        conn.close()
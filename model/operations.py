@@ -1,10 +1,99 @@
 # model/operations.py
-from pony.orm import db_session, select, delete, commit
+from pony.orm import db_session, select, delete, commit, flush, desc, exists, count, max as max_, raw_sql
 from werkzeug.security import generate_password_hash
 from datetime import date
+from collections import OrderedDict
+import functools
+import json
+import threading
 
+from .database import db
 from .user import User
-from .project import Project
+from .project import Project, DEFAULT_DOT_GRAPH
+from .blob import DotBlob, content_hash
+from .revision import DotRevision
+from .records import UserRecord, ProjectRecord
+from .audit_log import record_event
+from .read_path import read_session
+from .write_path import write_session, after_commit
+from .search import index_project_labels
+from .dot import (
+    SNAPSHOT_INTERVAL, encode_snapshot, encode_delta, decode_snapshot,
+    apply_delta, diff_dot
+)
+
+# Maximum number of users returned by one member search
+MEMBER_SEARCH_LIMIT = 20
+
+# Small LRU cache of member usernames per project. Entries hold the project's
+# data version they were read at and only serve that version, so changes made
+# by other worker processes are seen too; changes made here drop them early
+MEMBER_NAMES_CACHE_SIZE = 256
+_member_names_cache = OrderedDict()
+_member_names_lock = threading.Lock()
+
+def _drop_member_names(project_id=None):
+    with _member_names_lock:
+        if project_id is None:
+            _member_names_cache.clear()
+        else:
+            _member_names_cache.pop(int(project_id), None)
+
+def _invalidate_member_names(project_id=None):
+    """Drop cached member names for a project (or for all projects) once the write has committed"""
+    after_commit(functools.partial(_drop_member_names, project_id))
+
+def _id_list(ids):
+    """Encode a list of ids as one JSON parameter for SQLite's json_each"""
+    return json.dumps(sorted({int(i) for i in ids}))
+
+# Data versions (see DataVersion): bumped by every mutation, in its transaction
+def _bump_versions(keys):
+    """Increment the versions of the given keys"""
+    keys = json.dumps(sorted(set(keys)))
+    db.execute("""
+        INSERT INTO "DataVersion" ("key", "version")
+        SELECT "value", 1 FROM json_each($keys) WHERE true
+        ON CONFLICT ("key") DO UPDATE SET "version" = "version" + 1
+    """)
+
+def _project_version_keys(project_ids, user_ids=()):
+    """Return the version keys of projects and of the project lists that show them
+
+    Those are the lists of the projects' managers and members, plus the
+    lists of user_ids (users whose membership is changing).
+    """
+    projects = _id_list(project_ids)
+    owners = db.select("""SELECT 'projects:' || "manager" FROM "Project"
+        WHERE "id" IN (SELECT "value" FROM json_each($projects))
+        UNION SELECT 'projects:' || "user" FROM "Project_User"
+        WHERE "project" IN (SELECT "value" FROM json_each($projects))
+    """)
+    return ([f'project:{int(project_id)}' for project_id in project_ids] + owners
+            + [f'projects:{int(user_id)}' for user_id in user_ids])
+
+def _get_version(key):
+    """Return the version of a key: one primary key lookup"""
+    rows = db.select('SELECT "version" FROM "DataVersion" WHERE "key" = $key')
+    return rows[0] if rows else 0
+
+@read_session
+def get_users_version():
+    """Return the version of the users table"""
+    return _get_version('users')
+
+@read_session
+def get_project_version(project_id):
+    """Return the version of a project"""
+    try:
+        return _get_version(f'project:{int(project_id)}')
+    except (ValueError, TypeError):
+        return 0
+
+@read_session
+def get_project_list_version(user_id):
+    """Return the version of the projects a user manages or is a member of"""
+    return _get_version(f'projects:{int(user_id)}')
 
 # Database initialization
 @db_session
@@ -15,7 +104,7 @@ def initialize_db():
         User(username='a', password_hash=generate_password_hash('a'), is_admin=True)
 
 # User management functions
-@db_session
+@read_session
 def get_user(user_id):
     """Get a user by ID"""
     try:
@@ -23,26 +112,63 @@ def get_user(user_id):
     except (ValueError, TypeError):
         return None
 
-@db_session
+@read_session
 def get_user_by_username(username):
     """Get a user by username"""
     return User.get(username=username)
 
-@db_session
+@write_session
 def add_user(username, password, email=None, is_admin=False):
     """Add a new user to the database"""
     if User.get(username=username):
         return False
     
-    User(
+    user = User(
         username=username, 
         password_hash=generate_password_hash(password),
         email=email,
         is_admin=is_admin
     )
+    flush()
+    _bump_versions(['users'])
+    record_event('user.create', 'user', user.id, username=username, is_admin=is_admin)
     return True
 
-@db_session
+@read_session
+def existing_usernames(usernames):
+    """Return the subset of usernames that are already taken"""
+    usernames = list(usernames)
+    return set(select(u.username for u in User if u.username in usernames))
+
+@write_session
+def add_users(users):
+    """Insert users whose passwords are already hashed, in one statement
+
+    users is a list of dicts with username, password_hash and optionally
+    email and is_admin. Existing usernames are skipped. Returns the number
+    of users inserted.
+    """
+    rows = json.dumps([
+        {
+            'username': user['username'],
+            'password_hash': user['password_hash'],
+            'email': user.get('email') or '',
+            'is_admin': bool(user.get('is_admin'))
+        }
+        for user in users
+    ])
+    cursor = db.execute("""
+        INSERT OR IGNORE INTO "User" ("username", "password_hash", "email", "is_active", "is_admin")
+        SELECT json_extract("value", '$$.username'), json_extract("value", '$$.password_hash'),
+               json_extract("value", '$$.email'), 1, json_extract("value", '$$.is_admin')
+        FROM json_each($rows)
+    """)
+    if cursor.rowcount:
+        _bump_versions(['users'])
+        record_event('user.bulk_create', 'user', count=cursor.rowcount)
+    return cursor.rowcount
+
+@read_session
 def validate_user(username, password):
     """Validate user credentials"""
     user = User.get(username=username)
@@ -50,32 +176,151 @@ def validate_user(username, password):
         return user
     return None
 
-@db_session
+@read_session
 def list_all_users():
     """Return a list of all users (for administration)"""
     return select(u for u in User)[:]
 
-@db_session
+@read_session
+def list_user_records():
+    """Return a UserRecord for every user, ordered by id (for the users table)"""
+    query = select((u.id, u.username, u.email, u.is_admin) for u in User).order_by(1)
+    return [UserRecord._make(row) for row in query]
+
+@read_session
+def search_users(prefix='', exclude_project_id=None, exclude_user_id=None, limit=MEMBER_SEARCH_LIMIT):
+    """Return up to limit (id, username) pairs whose username starts with prefix
+
+    The prefix match is a case-sensitive GLOB, which SQLite runs as a range
+    scan on the unique username index, and the members of exclude_project_id
+    are filtered out in SQL.
+    """
+    # GLOB's wildcards in the prefix match themselves inside brackets
+    pattern = ''.join(f'[{char}]' if char in '*?[' else char for char in prefix or '') + '*'
+    exclude_user_id = int(exclude_user_id) if exclude_user_id is not None else 0
+    exclude_project_id = int(exclude_project_id) if exclude_project_id is not None else 0
+    
+    query = select((u.id, u.username) for u in User
+                   if raw_sql('"u"."username" GLOB $pattern') and u.id != exclude_user_id
+                   and not exists(p for p in u.member_of_projects if p.id == exclude_project_id))
+    return query.order_by(2).limit(limit)[:]
+
+@write_session
 def promote_user_to_admin(user_id):
     """Promote a regular user to admin"""
     user = get_user(user_id)
     if user and not user.is_admin:
         user.is_admin = True
+        _bump_versions(['users'])
+        record_event('user.promote', 'user', user.id)
         return True
     return False
 
-@db_session
-def delete_user(user_id):
-    """Delete a user and all their projects"""
-    user = get_user(user_id)
-    if user:
-        # Projects managed by this user will be automatically deleted due to cascade_delete
-        user.delete()
-        return True
-    return False
+@write_session
+def delete_user(user_id, chunk_size=None):
+    """Delete a user and all their projects
+
+    With chunk_size, the managed projects are deleted in transactions of at
+    most chunk_size projects, so other writers are not blocked for the whole
+    cascade.
+    """
+    try:
+        user_id = int(user_id)
+    except (ValueError, TypeError):
+        return False
+    if not User.exists(id=user_id):
+        return False
+    return delete_users([user_id], chunk_size)['users'] == 1
+
+@write_session
+def promote_users_to_admin(user_ids):
+    """Promote several users to admin in one statement; returns the number promoted"""
+    ids = _id_list(user_ids)
+    cursor = db.execute("""
+        UPDATE "User" SET "is_admin" = 1
+        WHERE "id" IN (SELECT "value" FROM json_each($ids)) AND "is_admin" = 0
+        RETURNING "id"
+    """)
+    promoted = [row[0] for row in cursor.fetchall()]
+    if promoted:
+        _bump_versions(['users'])
+    for user_id in promoted:
+        record_event('user.promote', 'user', user_id)
+    return len(promoted)
+
+def _delete_managed_projects(ids, limit=-1):
+    """Delete up to limit projects managed by the users in ids (-1 for all)
+
+    Returns the number of deleted projects and memberships.
+    """
+    params = {'ids': ids, 'limit': limit}
+    project_ids = db.select(
+        'SELECT "id" FROM "Project" WHERE "manager" IN (SELECT "value" FROM json_each($ids)) LIMIT $limit',
+        params
+    )
+    if not project_ids:
+        return 0, 0
+
+    params['projects'] = json.dumps(project_ids)
+    projects_in = 'IN (SELECT "value" FROM json_each($projects))'
+    blobs = db.select(
+        f'SELECT DISTINCT "dot_blob" FROM "Project" WHERE "id" {projects_in} AND "dot_blob" IS NOT NULL',
+        params
+    )
+    memberships = db.execute(f'DELETE FROM "Project_User" WHERE "project" {projects_in}', params).rowcount
+    db.execute(f'DELETE FROM "DotRevision" WHERE "project" {projects_in}', params)
+    projects = db.execute(f'DELETE FROM "Project" WHERE "id" {projects_in}', params).rowcount
+
+    # Drop the DOT blobs that only the deleted projects were using
+    params['blobs'] = json.dumps(blobs)
+    db.execute("""
+        DELETE FROM "DotBlob"
+        WHERE "hash" IN (SELECT "value" FROM json_each($blobs))
+          AND NOT EXISTS (SELECT 1 FROM "Project" WHERE "dot_blob" = "DotBlob"."hash")
+    """, params)
+    return projects, memberships
+
+@write_session
+def delete_users(user_ids, chunk_size=None):
+    """Delete several users and the projects they manage with set-based statements
+
+    Everything runs in one transaction unless chunk_size is given, in which
+    case the managed projects are committed in chunks before the users go.
+    Returns a dict with the number of deleted users, projects and memberships.
+    """
+    ids = _id_list(user_ids)
+    # The projects the users manage or belong to, and the lists showing them,
+    # are collected before the memberships go
+    affected = db.select("""SELECT "id" FROM "Project" WHERE "manager" IN (SELECT "value" FROM json_each($ids))
+        UNION SELECT "project" FROM "Project_User" WHERE "user" IN (SELECT "value" FROM json_each($ids))
+    """)
+    version_keys = ['users'] + _project_version_keys(affected)
+    projects = memberships = 0
+    while True:
+        deleted_projects, deleted_memberships = _delete_managed_projects(ids, chunk_size or -1)
+        projects += deleted_projects
+        memberships += deleted_memberships
+        if not chunk_size or not deleted_projects:
+            break
+        commit()
+
+    memberships += db.execute(
+        'DELETE FROM "Project_User" WHERE "user" IN (SELECT "value" FROM json_each($ids))'
+    ).rowcount
+    db.execute('UPDATE "DotRevision" SET "author" = NULL WHERE "author" IN (SELECT "value" FROM json_each($ids))')
+    deleted = db.execute(
+        'DELETE FROM "User" WHERE "id" IN (SELECT "value" FROM json_each($ids)) RETURNING "id", "username"'
+    ).fetchall()
+    _invalidate_member_names()
+    _bump_versions(version_keys)
+    for user_id, username in deleted:
+        record_event('user.delete', 'user', user_id, username=username)
+    if projects:
+        record_event('project.bulk_delete', 'project', count=projects, managers=[row[0] for row in deleted])
+    return {'users': len(deleted), 'projects': projects, 'memberships': memberships}
 
 # Project management functions
-@db_session
+@write_session
 def create_project(name, start_date, manager_id):
     """Create a new project with the given manager"""
     manager = get_user(manager_id)
@@ -85,22 +330,29 @@ def create_project(name, start_date, manager_id):
     project = Project(
         name=name,
         start_date=start_date,
-        manager=manager
+        manager=manager,
+        dot_blob=store_dot_blob(DEFAULT_DOT_GRAPH)
     )
+    _record_dot_revision(project, None, DEFAULT_DOT_GRAPH, manager)
+    # The insert trigger indexed the name; the labels come from the graph
+    flush()
+    index_project_labels(project.id, DEFAULT_DOT_GRAPH)
+    _bump_versions([f'projects:{manager.id}'])
 
     commit()
+    record_event('project.create', 'project', project.id, name=name)
 
     return project.id
 
-@db_session
+@read_session
 def get_project(project_id):
-    """Get a project by ID"""
+    """Get a project by ID (None if there is no such project)"""
     try:
-        return Project[int(project_id)]
+        return Project.get(id=int(project_id))
     except (ValueError, TypeError):
         return None
 
-@db_session
+@write_session
 def close_project(project_id, end_date):
     """Close a project by setting its end date"""
     project = get_project(project_id)
@@ -111,9 +363,11 @@ def close_project(project_id, end_date):
         return False
         
     project.end_date = end_date
+    _bump_versions(_project_version_keys([project.id]))
+    record_event('project.close', 'project', project.id, end_date=end_date)
     return True
 
-@db_session
+@write_session
 def add_member_to_project(project_id, user_id):
     """Add a user as a member to a project"""
     project = get_project(project_id)
@@ -124,11 +378,14 @@ def add_member_to_project(project_id, user_id):
     
     if user not in project.members:
         project.members.add(user)
+        _invalidate_member_names(project.id)
+        _bump_versions(_project_version_keys([project.id], [user.id]))
+        record_event('project.add_member', 'project', project.id, user_id=user.id)
         return True
     
     return False
 
-@db_session
+@write_session
 def remove_member_from_project(project_id, user_id):
     """Remove a user from a project's members"""
     project = get_project(project_id)
@@ -139,11 +396,108 @@ def remove_member_from_project(project_id, user_id):
     
     if user in project.members:
         project.members.remove(user)
+        _invalidate_member_names(project.id)
+        _bump_versions(_project_version_keys([project.id], [user.id]))
+        record_event('project.remove_member', 'project', project.id, user_id=user.id)
         return True
     
     return False
 
-@db_session
+@write_session
+def add_members_to_project(project_id, user_ids):
+    """Add several users to a project's members in one statement
+
+    Unknown users and existing members are skipped. Returns the number of
+    memberships created, or None if the project does not exist.
+    """
+    project_id = int(project_id)
+    if not Project.exists(id=project_id):
+        return None
+    
+    ids = _id_list(user_ids)
+    cursor = db.execute("""
+        INSERT OR IGNORE INTO "Project_User" ("project", "user")
+        SELECT $project_id, "u"."id" FROM "User" "u"
+        WHERE "u"."id" IN (SELECT "value" FROM json_each($ids))
+    """)
+    _invalidate_member_names(project_id)
+    if cursor.rowcount:
+        _bump_versions(_project_version_keys([project_id]))
+        record_event('project.add_members', 'project', project_id, count=cursor.rowcount)
+    return cursor.rowcount
+
+@write_session
+def remove_members_from_project(project_id, user_ids):
+    """Remove several users from a project's members in one statement
+
+    Returns the number of memberships removed, or None if the project does
+    not exist.
+    """
+    project_id = int(project_id)
+    if not Project.exists(id=project_id):
+        return None
+    
+    ids = _id_list(user_ids)
+    cursor = db.execute("""
+        DELETE FROM "Project_User"
+        WHERE "project" = $project_id
+          AND "user" IN (SELECT "value" FROM json_each($ids))
+    """)
+    _invalidate_member_names(project_id)
+    if cursor.rowcount:
+        _bump_versions(_project_version_keys([project_id], json.loads(ids)))
+        record_event('project.remove_members', 'project', project_id, count=cursor.rowcount)
+    return cursor.rowcount
+
+@read_session
+def get_project_member_names(project_id):
+    """Get the sorted usernames of a project's members (cached per project and data version)"""
+    try:
+        project_id = int(project_id)
+    except (ValueError, TypeError):
+        return []
+    
+    # Read in the same snapshot as the names, so an entry never outlives its data
+    version = _get_version(f'project:{project_id}')
+    with _member_names_lock:
+        cached = _member_names_cache.get(project_id)
+        if cached is not None and cached[0] == version:
+            _member_names_cache.move_to_end(project_id)
+            return cached[1]
+    
+    names = list(select(u.username for u in User for p in u.member_of_projects if p.id == project_id).order_by(1))
+    with _member_names_lock:
+        _member_names_cache[project_id] = (version, names)
+        _member_names_cache.move_to_end(project_id)
+        if len(_member_names_cache) > MEMBER_NAMES_CACHE_SIZE:
+            _member_names_cache.popitem(last=False)
+    return names
+
+@read_session
+def is_project_member(project_id, user_id):
+    """Check whether a user is a member of a project"""
+    try:
+        project_id, user_id = int(project_id), int(user_id)
+    except (ValueError, TypeError):
+        return False
+    return exists(u for u in User if u.id == user_id for p in u.member_of_projects if p.id == project_id)
+
+@read_session
+def is_project_visible(project_id, user_id):
+    """Check whether a user manages or is a member of a project"""
+    try:
+        project_id, user_id = int(project_id), int(user_id)
+    except (ValueError, TypeError):
+        return False
+    return exists(p for p in Project if p.id == project_id and (p.manager.id == user_id or user_id in p.members.id))
+
+@read_session
+def get_visible_project_ids(user_id):
+    """Return the ids of the projects a user manages or is a member of"""
+    user_id = int(user_id)
+    return set(select(p.id for p in Project if p.manager.id == user_id or user_id in p.members.id))
+
+@read_session
 def get_user_managed_projects(user_id):
     """Get all projects managed by a user"""
     user = get_user(user_id)
@@ -152,7 +506,7 @@ def get_user_managed_projects(user_id):
     
     return list(user.managed_projects)
 
-@db_session
+@read_session
 def get_user_member_projects(user_id):
     """Get all projects where the user is a member"""
     user = get_user(user_id)
@@ -161,36 +515,176 @@ def get_user_member_projects(user_id):
     
     return list(user.member_of_projects)
 
-@db_session
+def _project_records(query):
+    """Project the columns of the projects table out of a Project query"""
+    rows = select((p.id, p.name, p.start_date, p.end_date, p.manager.username, count(p.members))
+                  for p in query).order_by(1)
+    return [ProjectRecord._make(row) for row in rows]
+
+@read_session
+def get_project_record(project_id):
+    """Get the ProjectRecord of a project, or None"""
+    try:
+        project_id = int(project_id)
+    except (ValueError, TypeError):
+        return None
+    records = _project_records(Project.select(lambda p: p.id == project_id))
+    return records[0] if records else None
+
+@read_session
+def get_managed_project_records(user_id):
+    """Get a ProjectRecord for each project managed by a user"""
+    return _project_records(Project.select(lambda p: p.manager.id == user_id))
+
+@read_session
+def get_member_project_records(user_id):
+    """Get a ProjectRecord for each project where the user is a member"""
+    return _project_records(Project.select(lambda p: user_id in p.members.id))
+
+def _is_manager(project, user_id):
+    """True if user_id is the project's manager
+
+    Compares the manager foreign key, so the user row is never loaded.
+    """
+    try:
+        return project.manager.id == int(user_id)
+    except (ValueError, TypeError):
+        return False
+
+@write_session
 def delete_project(project_id, user_id):
     """Delete a project (only if user is the manager)"""
     project = get_project(project_id)
-    user = get_user(user_id)
-    
-    if not project or not user:
-        return False
     
     # Only the manager can delete a project
-    if project.manager.id != user.id:
+    if not project or not _is_manager(project, user_id):
         return False
         
     # Delete the project
+    blob = project.dot_blob
+    name = project.name
+    _bump_versions(_project_version_keys([project.id]))
     project.delete()
+    _release_dot_blob(blob)
+    _invalidate_member_names(project_id)
+    record_event('project.delete', 'project', int(project_id), name=name)
     return True
 
-@db_session
+@write_session
 def update_dot_graph(project_id, user_id, dot_graph_string):
     """Update the DOT graph for a project (only if user is the manager)"""
     project = get_project(project_id)
-    user = get_user(user_id)
-    
-    if not project or not user:
-        return False
     
     # Only the manager can update the project's DOT graph
-    if project.manager.id != user.id:
+    if not project or not _is_manager(project, user_id):
         return False
         
-    # Update the DOT graph
-    project.dot_graph = dot_graph_string
-    return True
\ No newline at end of file
+    # Point the project at the (possibly shared) blob for the new source
+    old_blob = project.dot_blob
+    new_blob = store_dot_blob(dot_graph_string)
+    if old_blob == new_blob:
+        return True
+    
+    previous_source = old_blob.content if old_blob else ''
+    project.dot_blob = new_blob
+    _record_dot_revision(project, previous_source, dot_graph_string or '', project.manager)
+    _release_dot_blob(old_blob)
+    index_project_labels(project.id, dot_graph_string)
+    _bump_versions([f'project:{project.id}'])
+    record_event('project.edit_graph', 'project', project.id)
+    return True
+
+# DOT graph storage functions
+@db_session
+def store_dot_blob(dot_graph_string):
+    """Return the blob holding a DOT source, creating it if it does not exist yet"""
+    if not dot_graph_string:
+        return None
+    
+    blob_hash = content_hash(dot_graph_string)
+    return DotBlob.get(hash=blob_hash) or DotBlob(hash=blob_hash, content=dot_graph_string)
+
+@read_session
+def get_dot_graph(project_id):
+    """Get the DOT source of a project (None if the project does not exist)"""
+    try:
+        project_id = int(project_id)
+    except (ValueError, TypeError):
+        return None
+    
+    project = Project.get(id=project_id)
+    if not project:
+        return None
+    # The blob content is a lazy column, loaded by this access only
+    return project.dot_blob.content if project.dot_blob else ''
+
+def _release_dot_blob(blob):
+    """Delete a blob once no project references it anymore"""
+    # Checked in SQL: the lazy dot_blob column is not loaded on cached projects
+    if blob and not Project.exists(dot_blob=blob):
+        blob.delete()
+
+# DOT revision history functions
+def _record_dot_revision(project, previous_source, new_source, author):
+    """Store a new revision of a project's graph as a snapshot or a delta"""
+    last_number = select(max_(r.number) for r in DotRevision if r.project == project).first() or 0
+    
+    # Projects saved before history existed get their previous source as revision 1
+    if last_number == 0 and previous_source:
+        DotRevision(project=project, number=1, is_snapshot=True,
+                    payload=encode_snapshot(previous_source))
+        last_number = 1
+    
+    number = last_number + 1
+    is_snapshot = previous_source is None or (number - 1) % SNAPSHOT_INTERVAL == 0
+    DotRevision(
+        project=project,
+        number=number,
+        author=author,
+        is_snapshot=is_snapshot,
+        payload=encode_snapshot(new_source) if is_snapshot else encode_delta(previous_source, new_source)
+    )
+
+@read_session
+def list_dot_revisions(project_id):
+    """Get the revisions of a project's graph, newest first"""
+    try:
+        project_id = int(project_id)
+    except (ValueError, TypeError):
+        return []
+    
+    return select(r for r in DotRevision if r.project.id == project_id).order_by(lambda r: desc(r.number))[:]
+
+@read_session
+def get_dot_revision(project_id, number):
+    """Get the DOT source of a revision (None if it does not exist)"""
+    try:
+        project_id, number = int(project_id), int(number)
+    except (ValueError, TypeError):
+        return None
+    
+    # Start from the closest snapshot and apply the deltas after it
+    snapshot_number = select(max_(r.number) for r in DotRevision
+                             if r.project.id == project_id and r.is_snapshot and r.number <= number).first()
+    if snapshot_number is None:
+        return None
+    
+    revisions = select(r for r in DotRevision
+                       if r.project.id == project_id and r.number >= snapshot_number and r.number <= number
+                       ).order_by(DotRevision.number)[:]
+    if not revisions or revisions[-1].number != number:
+        return None
+    
+    source = decode_snapshot(revisions[0].payload)
+    for revision in revisions[1:]:
+        source = apply_delta(source, revision.payload)
+    return source
+
+@read_session
+def diff_dot_revisions(project_id, from_number, to_number):
+    """Get the node/edge level differences between two revisions"""
+    old_source = get_dot_revision(project_id, from_number)
+    new_source = get_dot_revision(project_id, to_number)
+    if old_source is None or new_source is None:
+        return None
+    return diff_dot(old_source, new_source)
\ No newline at end of file
@@ -4,6 +4,9 @@ from datetime import date
 
 from .database import db
 
+# Graph every new project starts with
+DEFAULT_DOT_GRAPH = "digraph G {\n  A -> B;\n  B -> C;\n  C -> A;\n}"
+
 # Define the Project entity
 class Project(db.Entity):
     name = Required(str)
@@ -11,4 +14,7 @@ class Project(db.Entity):
     end_date = Optional(date)
     manager = Required("User", reverse="managed_projects")
     members = Set("User", reverse="member_of_projects")
-    dot_graph = Optional(str, default="digraph G {\n  A -> B;\n  B -> C;\n  C -> A;\n}")
\ No newline at end of file
+    # The DOT source lives in the content-addressed DotBlob table and is only
+    # loaded where the editor or renderer needs it (see get_dot_graph)
+    dot_blob = Optional("DotBlob", reverse="projects", lazy=True)
+    revisions = Set("DotRevision", reverse="project", cascade_delete=True)
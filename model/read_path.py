@@ -0,0 +1,46 @@
+# model/read_path.py
+import functools
+import sqlite3
+from pony.orm import db_session, TransactionError
+from pony.orm.core import local as _pony_local
+
+from .database import db
+
+def _end_read(connection):
+    """Close the read transaction before the connection is used again"""
+    try:
+        if connection.in_transaction:
+            connection.execute('ROLLBACK')
+    except sqlite3.ProgrammingError:
+        # Pony already closed a connection that failed
+        pass
+
+def read_session(fn):
+    """Decorator for functions that only read from the database
+
+    Used instead of db_session. All queries of the function run in one
+    deferred transaction, so they see a single WAL snapshot and never take
+    the write lock. Modified entities are never flushed: a function that
+    changes one raises TransactionError and nothing is written. Inside an
+    existing session the function simply joins it.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if _pony_local.db_session is not None:
+            return fn(*args, **kwargs)
+        connection = None
+        try:
+            with db_session:
+                cache = db._get_cache()
+                # Pony's own connection, still in autocommit mode
+                connection = cache.prepare_connection_for_query_execution()
+                connection.execute('BEGIN DEFERRED')
+                with cache.flush_disabled():
+                    result = fn(*args, **kwargs)
+                if cache.modified:
+                    raise TransactionError(f'{fn.__name__} modified the database in a read_session')
+                return result
+        finally:
+            if connection is not None:
+                _end_read(connection)
+    return wrapper
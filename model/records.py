@@ -0,0 +1,28 @@
+# model/records.py
+from typing import NamedTuple, Optional
+from datetime import date
+
+# Read-only rows for the list views. They are plain tuples (no per-instance
+# __dict__, no identity map entry) holding only the columns a table shows,
+# and stay valid after the db_session that loaded them has ended.
+
+class UserRecord(NamedTuple):
+    id: int
+    username: str
+    email: Optional[str]
+    is_admin: bool
+
+class ProjectRecord(NamedTuple):
+    id: int
+    name: str
+    start_date: date
+    end_date: Optional[date]
+    manager: str
+    member_count: int
+
+class SearchResult(NamedTuple):
+    id: int
+    name: str
+    end_date: Optional[date]
+    manager: str
+    snippet: str
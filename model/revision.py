@@ -0,0 +1,17 @@
+# model/revision.py
+from pony.orm import Required, Optional, composite_key
+from datetime import datetime
+
+from .database import db
+
+# Define the DotRevision entity: one saved version of a project's DOT graph.
+# The payload is compressed and holds either the full source (snapshot) or
+# a line delta against the previous revision (see model/dot.py)
+class DotRevision(db.Entity):
+    project = Required("Project", reverse="revisions")
+    number = Required(int)
+    created_at = Required(datetime, default=datetime.now)
+    author = Optional("User", reverse="dot_revisions")
+    is_snapshot = Required(bool, default=False)
+    payload = Required(bytes, lazy=True)
+    composite_key(project, number)
@@ -0,0 +1,137 @@
+# model/search.py
+import json
+import re
+import sqlite3
+from datetime import date
+
+from .database import db
+from .dot import parse_dot
+from .read_path import read_session
+from .records import SearchResult
+
+# Maximum number of projects returned by one search
+SEARCH_LIMIT = 20
+# Words of a search that are used; the rest are ignored
+SEARCH_MAX_TERMS = 8
+# Words of the labels shown around a match
+SNIPPET_WORDS = 8
+# Attributes whose values are indexed along with the node names
+LABEL_ATTRIBUTES = ('label', 'xlabel', 'headlabel', 'taillabel')
+
+# Full-text index of project names and graph labels, one row per project
+# (rowid = project id). Names are kept in sync by triggers; labels come
+# from the DOT parser, so the write path sets them (see index_project_labels).
+# Prefix indexes make the prefix queries of the search box cheap.
+_SEARCH_SCHEMA = [
+    '''CREATE VIRTUAL TABLE "ProjectSearch" USING fts5(
+        "name", "labels", prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+    )''',
+    '''CREATE TRIGGER "project_search_insert" AFTER INSERT ON "Project" BEGIN
+        INSERT INTO "ProjectSearch" ("rowid", "name", "labels") VALUES (new."id", new."name", '');
+    END''',
+    '''CREATE TRIGGER "project_search_rename" AFTER UPDATE OF "name" ON "Project" BEGIN
+        UPDATE "ProjectSearch" SET "name" = new."name" WHERE "rowid" = new."id";
+    END''',
+    '''CREATE TRIGGER "project_search_delete" AFTER DELETE ON "Project" BEGIN
+        DELETE FROM "ProjectSearch" WHERE "rowid" = old."id";
+    END''',
+]
+
+# Rank of a match, best first: a word in the name counts four times one in the labels
+_SCORE = 'bm25("ProjectSearch", 4.0, 1.0)'
+
+# Ids of the projects a user manages or is a member of, materialized so the
+# full-text match drives the query and probes this set
+_VISIBLE_IDS = """(SELECT "id" FROM "Project" WHERE "manager" = $user_id
+    UNION SELECT "project" FROM "Project_User" WHERE "user" = $user_id)"""
+
+_WORD = re.compile(r'\w+')
+
+def graph_labels(source):
+    """Return the searchable text of a DOT source: node names and label attributes"""
+    nodes, edges = parse_dot(source or '')
+    words = list(nodes)
+    for attrs in (*nodes.values(), *edges.values()):
+        words.extend(value for key, value in attrs if key in LABEL_ATTRIBUTES)
+    return ' '.join(words)
+
+def create_search_index(db_path):
+    """Create the search index and fill it from the existing projects, once
+
+    Each distinct graph is parsed only once, however many projects share it.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            # Taking the write lock first, so only one process builds the index
+            conn.execute('BEGIN IMMEDIATE')
+            if conn.execute('''SELECT 1 FROM sqlite_master WHERE "name" = 'ProjectSearch' ''').fetchone():
+                return False
+            for statement in _SEARCH_SCHEMA:
+                conn.execute(statement)
+            labels = {}
+            def rows():
+                for project_id, name, blob_hash, content in conn.execute('''SELECT p."id", p."name", b."hash", b."content"
+                        FROM "Project" p LEFT JOIN "DotBlob" b ON b."hash" = p."dot_blob"''').fetchall():
+                    if blob_hash not in labels:
+                        labels[blob_hash] = graph_labels(content)
+                    yield project_id, name, labels[blob_hash]
+            conn.executemany('INSERT INTO "ProjectSearch" ("rowid", "name", "labels") VALUES (?, ?, ?)', rows())
+        return True
+    finally:
+        conn.close()
+
+def index_project_labels(project_id, source):
+    """Replace the indexed labels of a project; called by the write path with each new graph"""
+    labels = graph_labels(source)
+    db.execute('UPDATE "ProjectSearch" SET "labels" = $labels WHERE "rowid" = $project_id')
+
+def _search_terms(text):
+    """Return the words of a search, lowercased"""
+    return [term.lower() for term in _WORD.findall(text or '')[:SEARCH_MAX_TERMS]]
+
+def _match_query(terms):
+    """Turn search words into an FTS5 query: every word, as a prefix"""
+    return ' '.join(f'"{term}"*' for term in terms)
+
+def _snippet(name, labels, terms):
+    """Return the part of the labels around the first matching word, or the name if only it matches"""
+    words = labels.split()
+    for i, word in enumerate(words):
+        if word.lower().startswith(tuple(terms)):
+            start = max(i - SNIPPET_WORDS // 2, 0)
+            return ' '.join(words[start:start + SNIPPET_WORDS])
+    return name
+
+@read_session
+def search_projects(text, user_id=None, limit=SEARCH_LIMIT):
+    """Return a SearchResult for each project whose name or graph labels match text, best first
+
+    Every word of text must match the start of a word in the project's name
+    or labels; names weigh more than labels in the ranking, and every
+    match is ranked. With user_id only that user's managed and member
+    projects are searched, otherwise every project is.
+    """
+    terms = _search_terms(text)
+    if not terms:
+        return []
+    query = _match_query(terms)
+    if user_id is None:
+        ranked = db.select(f"""SELECT "rowid" FROM "ProjectSearch"
+            WHERE "ProjectSearch" MATCH $query ORDER BY {_SCORE} LIMIT $limit""")
+    else:
+        ranked = db.select(f"""SELECT "ProjectSearch"."rowid" FROM "ProjectSearch"
+            JOIN {_VISIBLE_IDS} v ON v."id" = "ProjectSearch"."rowid"
+            WHERE "ProjectSearch" MATCH $query ORDER BY {_SCORE} LIMIT $limit""")
+    if not ranked:
+        return []
+    
+    ids = json.dumps(ranked)
+    rows = {row[0]: row for row in db.select("""SELECT p."id", p."name", p."end_date", m."username", s."labels"
+        FROM "Project" p
+        JOIN "User" m ON m."id" = p."manager"
+        JOIN "ProjectSearch" s ON s."rowid" = p."id"
+        WHERE p."id" IN (SELECT "value" FROM json_each($ids))""")}
+    return [SearchResult(project_id, name, end_date and date.fromisoformat(end_date), manager,
+                         _snippet(name, labels, terms))
+            for project_id, name, end_date, manager, labels in map(rows.get, ranked)]
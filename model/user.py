@@ -14,6 +14,7 @@ class User(db.Entity, UserMixin):
     is_admin = Required(bool, default=False)
     managed_projects = Set('Project', cascade_delete=True, reverse="manager")
     member_of_projects = Set('Project', reverse="members")
+    dot_revisions = Set('DotRevision', reverse="author")
     
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
@@ -0,0 +1,12 @@
+# model/version.py
+from pony.orm import PrimaryKey, Required
+
+from .database import db
+
+# Define the DataVersion entity: a counter per view of the data, bumped in
+# the same transaction as every change to that view. Keys are 'users' (the
+# users table), 'project:<id>' (one project) and 'projects:<user id>' (the
+# projects a user manages or is a member of). A missing key is version 0
+class DataVersion(db.Entity):
+    key = PrimaryKey(str)
+    version = Required(int, default=0)
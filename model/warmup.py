@@ -0,0 +1,65 @@
+# model/warmup.py
+from pony.orm import select, max as max_
+
+from .user import User
+from .project import Project
+from .revision import DotRevision
+from .read_path import read_session
+from .audit_log import list_audit_events
+from .operations import (
+    get_user, get_user_by_username, existing_usernames, list_user_records, search_users,
+    get_project, get_project_record, get_managed_project_records, get_member_project_records,
+    get_project_member_names, get_dot_graph, list_dot_revisions, get_dot_revision
+)
+
+@read_session
+def _sample_keys():
+    """Return a user id, its username, a project id and its last revision number
+
+    The ids are None when there is no user or no project.
+    """
+    user = select(u for u in User).first()
+    project_id = select(p.id for p in Project).first()
+    last_revision = select(max_(r.number) for r in DotRevision if r.project.id == project_id).first() or 1
+    return (user.id, user.username) if user else (None, ''), project_id, last_revision
+
+def warm_up_queries():
+    """Run every query the pages use once so Pony translates and caches it
+
+    Pony translates a generator query on its first use in the process, and
+    the translation is shared by all threads afterwards. The first user and
+    project in the database are used, so queries that stop early on a miss
+    are reached too. Without a user or a project the queries that look one
+    up by id are skipped, since Pony raises on a missing primary key.
+    Each function runs in its own session, as it would in a request.
+    Returns the number of read functions that were run.
+    """
+    (user_id, username), project_id, last_revision = _sample_keys()
+
+    calls = [
+        (get_user_by_username, username),
+        (existing_usernames, [username]),
+        (list_user_records,),
+        (search_users, username[:1], project_id, user_id),
+        (list_audit_events,),
+        (list_audit_events, 0),
+        (list_audit_events, None, 0),
+    ]
+    if user_id is not None:
+        calls += [
+            (get_user, user_id),
+            (get_managed_project_records, user_id),
+            (get_member_project_records, user_id),
+        ]
+    if project_id is not None:
+        calls += [
+            (get_project, project_id),
+            (get_project_record, project_id),
+            (get_project_member_names, project_id),
+            (get_dot_graph, project_id),
+            (list_dot_revisions, project_id),
+            (get_dot_revision, project_id, last_revision),
+        ]
+    for fn, *args in calls:
+        fn(*args)
+    return len(calls)
@@ -0,0 +1,187 @@
+# model/write_path.py
+import functools
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+import queue
+from pony.orm import db_session
+from pony.orm.core import local as _pony_local
+
+from . import audit_log
+
+# Bounded retries of a write that found the database locked, with jittered
+# exponential backoff between attempts
+WRITE_RETRIES = 4
+WRITE_BACKOFF = 0.05
+WRITE_BACKOFF_MAX = 1.0
+
+# Run every model write on one writer thread per process (SERIALIZE_WRITES=1)
+SERIALIZE_WRITES = os.environ.get('SERIALIZE_WRITES') == '1'
+
+_BUSY_MESSAGES = ('database is locked', 'database table is locked', 'database is busy')
+
+_metrics_lock = threading.Lock()
+_metrics = {}
+
+def reset_write_metrics():
+    """Zero the write path counters"""
+    with _metrics_lock:
+        _metrics.update({
+            'writes': 0, 'retries': 0, 'failures': 0, 'write_time': 0.0, 'max_write_time': 0.0,
+            'lock_wait': 0.0, 'max_lock_wait': 0.0, 'queue_wait': 0.0
+        })
+
+def get_write_metrics():
+    """Return a snapshot of the write path counters
+
+    write_time is the time of the successful attempts, including SQLite's
+    own busy wait; lock_wait is the time spent on attempts that found the
+    database locked plus the backoff after them; queue_wait is the time
+    spent waiting for the writer thread. All are in seconds.
+    """
+    with _metrics_lock:
+        metrics = dict(_metrics)
+    metrics['avg_write_time'] = metrics['write_time'] / metrics['writes'] if metrics['writes'] else 0.0
+    metrics['avg_lock_wait'] = metrics['lock_wait'] / metrics['writes'] if metrics['writes'] else 0.0
+    return metrics
+
+def _count(**values):
+    with _metrics_lock:
+        for key, value in values.items():
+            _metrics[key] += value
+
+# Per-thread callbacks held back until the current write has committed
+_local = threading.local()
+
+def after_commit(callback):
+    """Call callback once the current write session has committed (right away outside one)
+
+    Used for in-process caches: dropping an entry before the commit would
+    let a concurrent reader cache the old data again.
+    """
+    callbacks = getattr(_local, 'after_commit', None)
+    if callbacks is None:
+        callback()
+    else:
+        callbacks.append(callback)
+
+def _is_busy(error):
+    """True if an exception (or the commit errors it wraps) means the database was locked"""
+    errors = [error] + [e for _, e, _ in getattr(error, 'exceptions', [])]
+    return any(message in str(e).lower() for e in errors for message in _BUSY_MESSAGES)
+
+def _run_with_retries(fn, args, kwargs):
+    """Run fn in its own db_session, retrying the whole session while the database is locked
+
+    Audit events are only queued, and after_commit callbacks only called,
+    once the session has committed, so a retried or failed write never
+    logs anything.
+    """
+    waited = 0.0
+    for attempt in range(WRITE_RETRIES + 1):
+        started = time.perf_counter()
+        audit_log.defer_events()
+        _local.after_commit = []
+        try:
+            # BEGIN IMMEDIATE: the session's reads and writes form one locked
+            # transaction, so nothing it read can change before it writes
+            with db_session(immediate=True):
+                result = fn(*args, **kwargs)
+        except Exception as e:
+            audit_log.discard_deferred_events()
+            _local.after_commit = None
+            if not _is_busy(e) or attempt == WRITE_RETRIES:
+                _count(failures=1, lock_wait=waited)
+                raise
+            delay = random.uniform(0, min(WRITE_BACKOFF_MAX, WRITE_BACKOFF * 2 ** attempt))
+            time.sleep(delay)
+            waited += time.perf_counter() - started
+            _count(retries=1)
+        else:
+            audit_log.release_deferred_events()
+            callbacks, _local.after_commit = _local.after_commit, None
+            for callback in callbacks:
+                callback()
+            elapsed = time.perf_counter() - started
+            with _metrics_lock:
+                _metrics['writes'] += 1
+                _metrics['write_time'] += elapsed
+                _metrics['max_write_time'] = max(_metrics['max_write_time'], elapsed)
+                _metrics['lock_wait'] += waited
+                _metrics['max_lock_wait'] = max(_metrics['max_lock_wait'], waited)
+            return result
+
+class _Writer:
+    """One thread per process that runs queued writes in order"""
+
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name='db-writer', daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            fn, args, kwargs, actor, queued, future = self.jobs.get()
+            _count(queue_wait=time.perf_counter() - queued)
+            audit_log.set_actor(actor)
+            try:
+                future.set_result(_run_with_retries(fn, args, kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                audit_log.set_actor(None)
+
+    def submit(self, fn, args, kwargs):
+        future = Future()
+        self.jobs.put((fn, args, kwargs, audit_log.current_actor(), time.perf_counter(), future))
+        return future.result()
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def _get_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = _Writer()
+        return _writer
+
+def write_session(fn):
+    """Decorator for functions that write to the database
+
+    Used instead of db_session. The function runs in its own session that is
+    retried when SQLite reports the database as locked; inside an existing
+    session it simply joins it. With SERIALIZE_WRITES, model writes are
+    handed to the process' writer thread and the caller waits for the result.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        in_writer = _writer is not None and threading.current_thread() is _writer.thread
+        if SERIALIZE_WRITES and not in_writer and fn.__module__.startswith(__package__):
+            return _get_writer().submit(fn, args, kwargs)
+        if _pony_local.db_session is not None:
+            return fn(*args, **kwargs)
+        return _run_with_retries(fn, args, kwargs)
+    return wrapper
+
+def run_write(fn, *args, **kwargs):
+    """Run fn in a write session on the calling thread, even with SERIALIZE_WRITES
+
+    For the audit log's writer: the writer thread may be waiting for room
+    in the audit queue, so the batches that drain it must not wait for
+    the writer thread.
+    """
+    if _pony_local.db_session is not None:
+        return fn(*args, **kwargs)
+    return _run_with_retries(fn, args, kwargs)
+
+def _reset_after_fork():
+    """A forked child starts its own writer thread when it first needs one"""
+    global _writer, _writer_lock
+    _writer = None
+    _writer_lock = threading.Lock()
+
+reset_write_metrics()
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -2,44 +2,80 @@
 import dash
 import dash_bootstrap_components as dbc
 from flask_login import LoginManager
+import importlib
 import os
-from pony.orm import db_session
 
 # Import from restructured modules
-from model import get_user
+from model import get_user, read_session, warm_up_queries
 from view import get_app_layout
-from controller import register_callbacks
+from controller import register_callbacks, register_export_routes, register_event_routes, register_compression
 
-# Initialize the Dash app with Bootstrap styling
-app = dash.Dash(
-    __name__, 
-    external_stylesheets=[dbc.themes.BOOTSTRAP],
-    suppress_callback_exceptions=True
-)
+# Modules first imported while handling a request: by callbacks, by Dash's
+# JSON encoder and by datetime.strptime
+LAZY_IMPORTS = ('view.project_detail', 'model.migrations', 'plotly.io.json', '_strptime')
 
-server = app.server
+def warm_up_app(app):
+    """Do the one-off work of the first requests before serving any
 
-# Set a secure secret key for session management
-server.secret_key = os.environ.get('SECRET_KEY', 'your-secret-key-here-for-development')
+    Imports the lazily imported modules, has Pony translate the queries of
+    the pages, opens this thread's database connection, and lets Dash finish
+    its setup and serialize the layout and callback graph once.
+    """
+    for name in LAZY_IMPORTS:
+        importlib.import_module(name)
+    warm_up_queries()
+    client = app.server.test_client()
+    for path in ('/', '/_dash-layout', '/_dash-dependencies'):
+        client.get(path)
 
-# Configure Flask-Login
-login_manager = LoginManager()
-login_manager.init_app(server)
-login_manager.login_view = '/login'
+def create_app(warm_up=False):
+    """Build the Dash app with its login manager, layout, callbacks and routes
 
-@login_manager.user_loader
-@db_session
-def load_user(user_id):
-    return get_user(user_id)
+    With warm_up, the app is warmed up (see warm_up_app) before it is returned.
+    """
+    # Initialize the Dash app with Bootstrap styling
+    app = dash.Dash(
+        __name__, 
+        external_stylesheets=[dbc.themes.BOOTSTRAP],
+        suppress_callback_exceptions=True
+    )
+    
+    server = app.server
+    
+    # Set a secure secret key for session management (must be the same in every worker)
+    server.secret_key = os.environ.get('SECRET_KEY', 'your-secret-key-here-for-development')
+    
+    # Configure Flask-Login
+    login_manager = LoginManager()
+    login_manager.init_app(server)
+    login_manager.login_view = '/login'
+    
+    @login_manager.user_loader
+    @read_session
+    def load_user(user_id):
+        return get_user(user_id)
+    
+    # Set app layout
+    app.layout = get_app_layout()
+    
+    # Register all callbacks
+    register_callbacks(app)
+    
+    # Register the streaming export routes
+    register_export_routes(server)
+    
+    # Register the project change stream
+    register_event_routes(server)
+    
+    # Compress responses (the streams above are left alone)
+    register_compression(server)
+    
+    if warm_up:
+        warm_up_app(app)
+    return app
 
-# Set app layout
-app.layout = get_app_layout()
-
-# Register all callbacks
-register_callbacks(app)
-
-# Run the app
+# Run the development server (use wsgi.py with gunicorn in production)
 if __name__ == '__main__':
     print("Starting Dash MVC Application...")
     print("Access the application at http://127.0.0.1:8050/")
-    app.run_server(debug=True)
\ No newline at end of file
+    create_app(warm_up=os.environ.get('WARM_UP') == '1').run(debug=True)
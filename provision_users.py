@@ -0,0 +1,111 @@
+# provision_users.py
+"""Create many users at once from a CSV or JSON Lines file
+
+Usage:
+    python provision_users.py users.csv [--workers N] [--batch-size N]
+
+Each record needs a username and password, and may have an email and an
+is_admin flag. Records without either are rejected. Usernames that already
+exist are skipped, so the same file can be run again safely.
+"""
+import argparse
+import csv
+import json
+import os
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from werkzeug.security import generate_password_hash
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+
+def read_users(path):
+    """Yield user records from a .csv file (with a header row) or a .jsonl file"""
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith(('.jsonl', '.ndjson')):
+            records = (json.loads(line) for line in f if line.strip())
+        else:
+            records = csv.DictReader(f)
+        for record in records:
+            is_admin = record.get('is_admin')
+            if isinstance(is_admin, str):
+                is_admin = is_admin.strip().lower() in TRUE_VALUES
+            yield {
+                'username': (record.get('username') or '').strip(),
+                'password': record.get('password') or '',
+                'email': (record.get('email') or '').strip(),
+                'is_admin': bool(is_admin)
+            }
+
+def hash_user(user):
+    """Replace the plain password of a record with its hash (runs in a worker process)"""
+    return {
+        'username': user['username'],
+        'password_hash': generate_password_hash(user['password']),
+        'email': user['email'],
+        'is_admin': user['is_admin']
+    }
+
+def batches(records, size):
+    """Group records into lists of at most size items"""
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def provision_users(path, workers=None, batch_size=500):
+    """Hash the passwords in parallel and insert the new users batch by batch
+
+    Returns a dict with the number of records read, rejected (no username
+    or password), skipped and inserted.
+    """
+    from model import existing_usernames, add_users
+
+    workers = workers or os.cpu_count() or 1
+    stats = {'read': 0, 'rejected': 0, 'skipped': 0, 'inserted': 0}
+    seen = set()
+    # Workers are spawned, not forked, so they start without this process'
+    # database connection; they only hash passwords
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        for batch in batches(read_users(path), batch_size):
+            stats['read'] += len(batch)
+            valid = [user for user in batch if user['username'] and user['password']]
+            stats['rejected'] += len(batch) - len(valid)
+            taken = existing_usernames(user['username'] for user in valid)
+            new_users = []
+            for user in valid:
+                if user['username'] in taken or user['username'] in seen:
+                    continue
+                seen.add(user['username'])
+                new_users.append(user)
+
+            # Only new users are hashed, which is where the time goes
+            chunksize = max(1, len(new_users) // (workers * 4))
+            hashed = list(pool.map(hash_user, new_users, chunksize=chunksize))
+            inserted = add_users(hashed) if hashed else 0
+            stats['inserted'] += inserted
+            stats['skipped'] += len(valid) - inserted
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description='Create users in bulk from a CSV or JSON Lines file')
+    parser.add_argument('path', help='.csv file with a header row, or .jsonl file')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='number of hashing processes (default: CPU count)')
+    parser.add_argument('--batch-size', type=int, default=500,
+                        help='users inserted per transaction (default: 500)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats = provision_users(args.path, args.workers, args.batch_size)
+    elapsed = time.perf_counter() - start
+    print(f"Read {stats['read']} users: {stats['inserted']} created, "
+          f"{stats['skipped']} skipped (already exist), {stats['rejected']} rejected (no username or password)")
+    print(f"Took {elapsed:.2f}s ({stats['inserted'] / elapsed:.1f} users/s)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+# tests/test_warmup.py
+import os
+import shutil
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _copy_app(target):
+    """Copy the application into target without its database, as a fresh install would be"""
+    for name in ('mvc_app.py', 'wsgi.py', 'model', 'view', 'controller', 'assets'):
+        source = os.path.join(ROOT, name)
+        if os.path.isdir(source):
+            shutil.copytree(source, os.path.join(target, name), ignore=shutil.ignore_patterns('__pycache__'))
+        else:
+            shutil.copy(source, target)
+
+def test_boots_warmed_up_on_an_empty_database(tmp_path):
+    _copy_app(tmp_path)
+    script = (
+        'import wsgi, mvc_app\n'
+        'wsgi.create_server(warm_up=True)\n'
+        'mvc_app.create_app(warm_up=True)\n'
+    )
+    env = dict(os.environ, WARM_UP='1')
+    result = subprocess.run([sys.executable, '-c', script], cwd=tmp_path, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert os.path.exists(tmp_path / 'data' / 'app_database.sqlite')
@@ -1,10 +1,16 @@
 # view/admin.py
-from dash import html, dash_table
+from dash import html, dcc, dash_table
 import dash_bootstrap_components as dbc
 from flask_login import current_user
 
-def get_admin_layout():
-    """Returns the admin panel layout"""
+def get_admin_layout(users_table=None, audit_page=None, users_version=None):
+    """Returns the admin panel layout, optionally with its data already rendered
+
+    audit_page is the (content, bounds, newer disabled, older disabled)
+    tuple that the audit log paging produces; users_version is the users
+    data version the table was rendered at.
+    """
+    audit_content, audit_bounds, newer_disabled, older_disabled = audit_page or (None, None, True, True)
     return html.Div([
         html.H1('Admin Panel'),
         html.P('Manage users and system settings.'),
@@ -17,16 +23,31 @@ def get_admin_layout():
             dbc.Col([
                 dbc.Button('Refresh User List', id='refresh-users-button', color='primary', className='me-2'),
                 dbc.Button('Delete Selected', id='delete-selected-button', color='danger', className='me-2', disabled=True),
-                dbc.Button('Promote Selected', id='promote-selected-button', color='success', disabled=True),
+                dbc.Button('Promote Selected', id='promote-selected-button', color='success', className='me-2', disabled=True),
+                dbc.Button('Export Users', href='/export/users.csv', external_link=True, color='light'),
             ], width=12, className='mb-3')
         ]),
         
         # User table
-        html.Div(id='users-table-container')
+        html.Div(users_table, id='users-table-container'),
+        # Data version of the rendered table, so a refresh can skip an unchanged list
+        dcc.Store(id='users-table-version', data=users_version),
+        
+        # Audit log, paged by event id
+        html.H3('Audit Log', className='mt-5'),
+        dbc.Row([
+            dbc.Col([
+                dbc.Button('Latest', id='audit-latest-button', color='secondary', className='me-2'),
+                dbc.Button('Newer', id='audit-newer-button', color='light', className='me-2', disabled=newer_disabled),
+                dbc.Button('Older', id='audit-older-button', color='light', disabled=older_disabled),
+            ], width=12, className='mb-3')
+        ]),
+        dcc.Store(id='audit-page-bounds', data=audit_bounds),
+        html.Div(audit_content, id='audit-table-container')
     ])
 
 def create_users_table(users):
-    """Creates a data table for users with row selection"""
+    """Creates a data table of UserRecords with row selection"""
     return dash_table.DataTable(
         id='users-table',
         columns=[
@@ -44,7 +65,7 @@ def create_users_table(users):
             }
             for user in users
         ],
-        row_selectable='single',
+        row_selectable='multi',
         selected_rows=[],
         style_cell={'textAlign': 'left', 'padding': '10px'},
         style_header={
@@ -57,4 +78,34 @@ def create_users_table(users):
                 'backgroundColor': 'rgb(248, 248, 248)'
             }
         ]
-    )
\ No newline at end of file
+    )
+
+def create_audit_table(events):
+    """Creates a read-only data table for a page of audit events"""
+    return dash_table.DataTable(
+        id='audit-table',
+        columns=[
+            {'name': 'ID', 'id': 'id'},
+            {'name': 'Time', 'id': 'created_at'},
+            {'name': 'User', 'id': 'actor'},
+            {'name': 'Action', 'id': 'action'},
+            {'name': 'Target', 'id': 'target'},
+            {'name': 'Details', 'id': 'details'}
+        ],
+        data=[
+            {
+                'id': event.id,
+                'created_at': event.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+                'actor': event.actor or 'system',
+                'action': event.action,
+                'target': f'{event.target_type} {event.target_id}' if event.target_id else event.target_type,
+                'details': event.details
+            }
+            for event in events
+        ],
+        style_cell={'textAlign': 'left', 'padding': '10px'},
+        style_header={
+            'backgroundColor': 'rgb(230, 230, 230)',
+            'fontWeight': 'bold'
+        }
+    )
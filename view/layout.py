@@ -19,8 +19,12 @@ def get_app_layout():
         html.Div(id='page-content', className='container mt-4'),
         
         # Hidden containers for storing state
-        dcc.Store(id='selected-user-id'),
+        dcc.Store(id='selected-user-ids'),
         dcc.Store(id='selected-project-id'),
+        dcc.Store(id='loaded-project-tabs', data=[]),
+        # Project change stream followed by the page, and the last change it sent
+        dcc.Store(id='project-change-stream'),
+        dcc.Store(id='project-change'),
         
         # Modals for various actions
         create_delete_user_modal(),
@@ -83,10 +87,10 @@ def get_dashboard_layout():
     ])
 
 # Profile page layout (protected)
-def get_profile_layout():
-    """Returns the profile page layout"""
+def get_profile_layout(user_info=None):
+    """Returns the profile page layout, optionally with the user info already rendered"""
     return html.Div([
         html.H1('User Profile'),
         html.P('This is your profile page. Here you can view your account details.'),
-        html.Div(id='user-info')
+        html.Div(user_info, id='user-info')
     ])
\ No newline at end of file
@@ -7,7 +7,7 @@ def create_delete_user_modal():
     """Creates a confirmation modal for deleting users"""
     return dbc.Modal([
         dbc.ModalHeader("Confirm Deletion"),
-        dbc.ModalBody("Are you sure you want to delete this user? All their projects will also be deleted."),
+        dbc.ModalBody("Are you sure you want to delete the selected users? All their projects will also be deleted."),
         dbc.ModalFooter([
             dbc.Button("Cancel", id="cancel-delete-user", className="ms-auto", color="secondary"),
             dbc.Button("Delete", id="confirm-delete-user", color="danger"),
@@ -18,7 +18,7 @@ def create_promote_user_modal():
     """Creates a confirmation modal for promoting users to admin"""
     return dbc.Modal([
         dbc.ModalHeader("Confirm Promotion"),
-        dbc.ModalBody("Are you sure you want to promote this user to an administrator?"),
+        dbc.ModalBody("Are you sure you want to promote the selected users to administrators?"),
         dbc.ModalFooter([
             dbc.Button("Cancel", id="cancel-promote-user", className="ms-auto", color="secondary"),
             dbc.Button("Promote", id="confirm-promote-user", color="info"),
@@ -11,6 +11,7 @@ def get_navbar():
             dbc.NavItem(dbc.NavLink("Dashboard", href="/dashboard")),
             dbc.NavItem(dbc.NavLink("Profile", href="/profile")),
             dbc.NavItem(dbc.NavLink("My Projects", href="/projects")),
+            dbc.NavItem(dbc.NavLink("Search", href="/search")),
         ]
         
         # Add Admin section if user is admin
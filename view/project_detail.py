@@ -3,12 +3,12 @@
 from dash import html, dcc
 import dash_bootstrap_components as dbc
 from flask_login import current_user
-from pony.orm import db_session
+from model import read_session
 
-@db_session
+@read_session
 def get_project_detail_layout(project_id):
     """Returns the project detail page layout"""
-    from model import get_project
+    from model import get_project, get_dot_graph, list_dot_revisions, get_project_version
     
     project = get_project(project_id)
     if not project:
@@ -17,7 +17,10 @@ def get_project_detail_layout(project_id):
             dbc.Button("Back to Projects", href="/projects", color="primary")
         ])
     
+    dot_graph = get_dot_graph(project_id)
     return html.Div([
+        # Data version of the page, read in the same snapshot as the rest of it
+        dcc.Store(id='project-version', data=get_project_version(project_id)),
         dbc.Row([
             dbc.Col([
                 html.H2(project.name, className="d-inline-block me-2"),
@@ -54,6 +57,9 @@ def get_project_detail_layout(project_id):
             ], width=6)
         ]),
         
+        # Bulk membership row
+        create_bulk_membership_card(project) if project.manager.id == current_user.id and not project.end_date else html.Div(),
+        
         # DOT Graph Editor Row
         dbc.Row([
             dbc.Col([
@@ -65,17 +71,20 @@ def get_project_detail_layout(project_id):
                     dbc.CardBody([
                         dcc.Textarea(
                             id='dot-editor',
-                            value=project.dot_graph if hasattr(project, 'dot_graph') else "digraph G {\n  A -> B;\n  B -> C;\n  C -> A;\n}",
+                            value=dot_graph,
                             style={'width': '100%', 'height': '200px', 'fontFamily': 'monospace'},
                             className="mb-3"
                         ),
+                        # The saved graph, to tell unsaved edits apart when the project changes
+                        dcc.Store(id='dot-editor-saved', data=dot_graph),
                         html.Div([
                             # Store project_id as a data attribute in save-dot-graph button
                             dbc.Button("Save Changes", id="save-dot-graph", color="primary", className="me-2"),
                             dbc.Button("Generate Graph", id="generate-dot-graph", color="success", className="me-2"),
                             dbc.Button("Revert to Saved", id="revert-dot-graph", color="warning"),
                             # Add a hidden div with project ID specifically for the DOT editor
-                            html.Div(id="dot-editor-project-id", children=project_id, style={"display": "none"})
+                            html.Div(id="dot-editor-project-id", children=project_id, style={"display": "none"}),
+                            create_revision_history(list_dot_revisions(project_id))
                         ]) if project.manager.id == current_user.id else html.Div(),
                         html.Div(id="dot-graph-message", className="mt-2")
                     ])
@@ -130,4 +139,92 @@ def create_member_list(project):
             dbc.Button("Remove", id={'type': 'remove-member', 'index': member.id}, 
                      size="sm", color="danger", className="ms-2") if can_remove else html.Div()
         ], className="mb-2") for member in project.members
+    ])
+
+def create_bulk_membership_card(project):
+    """Creates the multi-select controls for adding and removing many members at once"""
+    return dbc.Row([
+        dbc.Col([
+            dbc.Card([
+                dbc.CardHeader("Bulk Membership"),
+                dbc.CardBody([
+                    dbc.Row([
+                        dbc.Col([
+                            dbc.Label("Users to add"),
+                            # Options are searched on the server as the user types
+                            dcc.Dropdown(id="bulk-add-members", multi=True, options=[],
+                                         placeholder="Type usernames to add"),
+                            dbc.Button("Add Selected", id="bulk-add-members-button", color="success", className="mt-2")
+                        ], width=6),
+                        dbc.Col([
+                            dbc.Label("Members to remove"),
+                            dcc.Dropdown(
+                                id="bulk-remove-members", multi=True,
+                                options=[{"label": member.username, "value": member.id} for member in project.members],
+                                placeholder="Select members to remove"
+                            ),
+                            dbc.Button("Remove Selected", id="bulk-remove-members-button", color="danger", className="mt-2")
+                        ], width=6)
+                    ]),
+                    html.Div(id="bulk-membership-message", className="mt-2")
+                ])
+            ])
+        ], width=12)
+    ], className="mt-3")
+
+def create_revision_options(revisions):
+    """Creates the select options for a list of graph revisions (newest first)"""
+    return [
+        {
+            "label": f"#{revision.number} - {revision.created_at:%Y-%m-%d %H:%M}"
+                     + (f" by {revision.author.username}" if revision.author else ""),
+            "value": revision.number
+        }
+        for revision in revisions
+    ]
+
+def create_revision_history(revisions):
+    """Creates the revision history controls of the DOT editor"""
+    options = create_revision_options(revisions)
+    latest = options[0]["value"] if options else None
+    previous = options[1]["value"] if len(options) > 1 else latest
+    return dbc.Row([
+        dbc.Col([
+            dbc.Label("Revision"),
+            dbc.Select(id="dot-revision-select", options=options, value=latest)
+        ], width=4),
+        dbc.Col([
+            dbc.Label("Compare with"),
+            dbc.Select(id="dot-compare-select", options=options, value=previous)
+        ], width=4),
+        dbc.Col([
+            dbc.Button("Load Revision", id="load-dot-revision", color="secondary", className="me-2"),
+            dbc.Button("Compare", id="compare-dot-revisions", color="info")
+        ], width=4, className="d-flex align-items-end"),
+        dbc.Col(html.Div(id="dot-revision-diff", className="mt-2"), width=12)
+    ], className="mt-3")
+
+def create_dot_diff_display(diff):
+    """Creates the node/edge level summary of a structural graph diff"""
+    labels = [
+        ('nodes_added', 'Nodes added', 'success'),
+        ('nodes_removed', 'Nodes removed', 'danger'),
+        ('nodes_changed', 'Nodes changed', 'warning'),
+        ('edges_added', 'Edges added', 'success'),
+        ('edges_removed', 'Edges removed', 'danger'),
+        ('edges_changed', 'Edges changed', 'warning'),
+    ]
+    if not any(diff[key] for key, _, _ in labels):
+        return html.P("No structural differences", className="text-muted")
+    
+    def describe(item):
+        return f"{item[0]} -> {item[1]}" if isinstance(item, tuple) else item
+    
+    # Only the first entries of each list are rendered to keep the payload small
+    return html.Ul([
+        html.Li([
+            dbc.Badge(f"{title}: {len(diff[key])}", color=color, className="me-2"),
+            ', '.join(describe(item) for item in diff[key][:20]) + (' ...' if len(diff[key]) > 20 else '')
+        ], className="mb-1")
+        for key, title, color in labels if diff[key]
     ])
\ No newline at end of file
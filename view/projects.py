@@ -1,12 +1,16 @@
 # view/projects.py
 
-from dash import html, dash_table
+from dash import html, dcc, dash_table
 import dash_bootstrap_components as dbc
 from flask_login import current_user
 from datetime import date
 
-def get_projects_layout():
-    """Returns the projects page layout"""
+def get_projects_layout(managed_content=None, version=None):
+    """Returns the projects page layout, optionally with the managed tab already rendered
+
+    version is the data version of the user's project list that the
+    rendered tab shows.
+    """
     return html.Div([
         html.H1('My Projects'),
         html.P('Create and manage your projects.'),
@@ -22,18 +26,27 @@ def get_projects_layout():
                 dbc.Button('Add Member', id='add-member-button', color='info', className='me-2', disabled=True),
                 dbc.Button('Close Project', id='close-project-button', color='warning', className='me-2', disabled=True),
                 dbc.Button('Refresh', id='refresh-projects-button', color='secondary', className='me-2'),
+                dbc.Button('Export CSV', href='/export/projects.csv', external_link=True,
+                           color='light', className='me-2'),
+                dbc.Button('Export Memberships', href='/export/memberships.csv', external_link=True,
+                           color='light', className='me-2'),
             ], width=12, className='mb-3')
         ]),
         
-        # Projects tabs
+        # Projects tabs (each tab's content is loaded when it is first shown)
         dbc.Tabs([
             dbc.Tab([
-                html.Div(id='managed-projects-container', className='mt-3')
-            ], label='Projects I Manage'),
+                html.Div(managed_content, id={'type': 'projects-container', 'tab': 'managed'}, className='mt-3')
+            ], label='Projects I Manage', tab_id='managed'),
             dbc.Tab([
-                html.Div(id='member-projects-container', className='mt-3')
-            ], label='Projects I\'m a Member Of')
-        ])
+                html.Div(id={'type': 'projects-container', 'tab': 'member'}, className='mt-3')
+            ], label='Projects I\'m a Member Of', tab_id='member')
+        ], id='projects-tabs', active_tab='managed'),
+        # Data version of the rendered tabs, so a refresh can skip an unchanged list
+        dcc.Store(id='projects-version', data=version),
+        
+        # Members of the active or selected project, loaded on demand
+        html.Div(id='project-members-details', className='mt-3')
     ])
 
 def create_projects_table(projects, is_manager=True):
@@ -49,18 +62,7 @@ def create_projects_table(projects, is_manager=True):
             {'name': 'Manager', 'id': 'manager'},
             {'name': 'Members', 'id': 'member_count'}
         ],
-        data=[
-            {
-                'id': project.id,
-                'name': project.name,
-                'start_date': project.start_date.strftime('%Y-%m-%d'),
-                'end_date': project.end_date.strftime('%Y-%m-%d') if project.end_date else 'Not set',
-                'status': 'Completed' if project.end_date else 'Active',
-                'manager': project.manager.username,
-                'member_count': len(project.members)
-            }
-            for project in projects
-        ],
+        data=[create_project_row(project) for project in projects],
         row_selectable='single',
         selected_rows=[],
         style_cell={'textAlign': 'left', 'padding': '10px'},
@@ -82,23 +84,27 @@ def create_projects_table(projects, is_manager=True):
                 'backgroundColor': 'rgba(201, 203, 207, 0.2)',
             }
         ],
-        tooltip_data=[
-            {
-                column: {'value': str(value), 'type': 'markdown'}
-                for column, value in row.items()
-            } for row in [
-                {
-                    'id': project.id,
-                    'name': project.name,
-                    'start_date': project.start_date,
-                    'end_date': project.end_date if project.end_date else 'Not set',
-                    'status': 'Completed' if project.end_date else 'Active',
-                    'manager': project.manager.username,
-                    'member_count': f"**Members:** {', '.join([member.username for member in project.members]) if project.members else 'None'}"
-                }
-                for project in projects
-            ]
-        ],
+        # Member names are fetched on demand for the active row (see show_project_members)
+        tooltip={'member_count': {'value': 'Click a row to list its members', 'use_with': 'data'}},
         tooltip_duration=None,
         style_table={'overflowX': 'auto'}
-    )
\ No newline at end of file
+    )
+
+def create_project_row(project):
+    """Creates a single projects table row from a ProjectRecord"""
+    return {
+        'id': project.id,
+        'name': project.name,
+        'start_date': project.start_date.strftime('%Y-%m-%d'),
+        'end_date': project.end_date.strftime('%Y-%m-%d') if project.end_date else 'Not set',
+        'status': 'Completed' if project.end_date else 'Active',
+        'manager': project.manager,
+        'member_count': project.member_count
+    }
+
+def create_project_members_details(project_id, member_names):
+    """Creates the member details shown for the active project row"""
+    return dbc.Alert([
+        html.Strong(f"Members of project {project_id}: "),
+        ', '.join(member_names) if member_names else 'None'
+    ], color='light')
\ No newline at end of file
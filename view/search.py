@@ -0,0 +1,33 @@
+# view/search.py
+from dash import html, dcc
+import dash_bootstrap_components as dbc
+
+def get_search_layout():
+    """Returns the project search page layout"""
+    return html.Div([
+        html.H1('Search Projects'),
+        html.P('Find projects by name or by the nodes and labels of their graphs.'),
+        
+        dbc.Input(id='project-search-input', type='search', placeholder='e.g. PaymentService',
+                  debounce=300, autofocus=True, className='mb-3'),
+        
+        # Ranked results, best match first
+        html.Div(id='project-search-results')
+    ])
+
+def create_search_results(results, text):
+    """Creates the ranked list of search results, each linking to its project"""
+    if not results:
+        return dbc.Alert(f'No projects match "{text}".', color='light')
+    return dbc.ListGroup([
+        dbc.ListGroupItem([
+            html.Div([
+                html.Strong(result.name, className='me-2'),
+                dbc.Badge('Completed' if result.end_date else 'Active',
+                          color='secondary' if result.end_date else 'success')
+            ]),
+            html.Small(f'Manager: {result.manager}', className='text-muted d-block'),
+            html.Small(result.snippet, className='font-monospace')
+        ], href=f'/project/{result.id}')
+        for result in results
+    ])
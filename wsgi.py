@@ -0,0 +1,24 @@
+# wsgi.py
+"""WSGI entry point for production servers
+
+    gunicorn -c gunicorn.conf.py
+
+or, without the config file:
+
+    gunicorn --workers 4 --threads 2 --preload 'wsgi:create_server()'
+"""
+import os
+
+from model import release_db_connection
+from mvc_app import create_app
+
+# Warm the app up before serving, so the first requests are not slower (WARM_UP=0 skips it)
+WARM_UP = os.environ.get('WARM_UP', '1') == '1'
+
+def create_server(warm_up=WARM_UP):
+    """Return the Flask server of a freshly built (and by default warmed up) app"""
+    server = create_app(warm_up=warm_up).server
+    # With --preload this runs in the master process: close its SQLite
+    # connection so no worker inherits a connection opened before the fork
+    release_db_connection()
+    return server